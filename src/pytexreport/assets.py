@@ -0,0 +1,57 @@
+import hashlib
+import os
+import shutil
+
+
+class AssetStore:
+    """Content-addressed copies of the files reports reference.
+
+    Each distinct file is hashed once per process and stored once as
+    ``directory/<sha256>.<ext>``. Build directories get hard links to the
+    stored copy, or symbolic links when they are on another filesystem.
+    """
+
+    def __init__(self, directory=None):
+        if directory is None:
+            directory = os.path.join(
+                os.path.expanduser("~"), ".cache", "pytexreport", "assets"
+            )
+        self.directory = directory
+        self.digests = {}
+
+    def digest(self, path):
+        # A file is hashed again only once it has been modified
+        stat = os.stat(path)
+        key = (os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+        digest = self.digests.get(key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    sha.update(chunk)
+            digest = self.digests[key] = sha.hexdigest()
+        return digest
+
+    def put(self, path):
+        stored = os.path.join(
+            self.directory, self.digest(path) + os.path.splitext(path)[1]
+        )
+        if not os.path.isfile(stored):
+            os.makedirs(self.directory, exist_ok=True)
+            partial = f"{stored}.{os.getpid()}.tmp"
+            shutil.copyfile(path, partial)
+            os.replace(partial, stored)
+        return stored
+
+    def link(self, path, target):
+        stored = self.put(path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.link(stored, target)
+            return
+        except OSError:
+            pass
+        try:
+            os.symlink(os.path.abspath(stored), target)
+        except OSError:
+            shutil.copyfile(stored, target)
@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+from loguru import logger
+
+from pytexreport.assets import AssetStore
+
+# Silent unless the application opts in with logger.enable("pytexreport.batch")
+logger.disable(__name__)
+
+
+@dataclass
+class RenderResult:
+    index: int
+    title: str
+    pdf: Optional[str]
+    seconds: float
+    error: Optional[str] = None
+    passes: int = 0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def _assetPaths(assets, source):
+    # Relative asset paths that exist below the caller's directory, with the
+    # file they point to
+    for asset in assets:
+        if os.path.isabs(asset):
+            continue
+        relative = os.path.normpath(asset)
+        if relative.startswith(os.pardir):
+            continue
+        path = os.path.join(source, relative)
+        if os.path.isfile(path):
+            yield relative, path
+
+
+def _stage(assets, source, workdir, store):
+    # Mirror relative asset paths into the isolated build directory so the
+    # document resolves them exactly as it would from the caller's directory.
+    for relative, path in _assetPaths(assets, source):
+        store.link(path, os.path.join(workdir, relative))
+
+
+def _render(index, report, name, source, output_dir, cache_dir, store):
+    start = time.perf_counter()
+    workdir = tempfile.mkdtemp(prefix="pytexreport-")
+    cwd = os.getcwd()
+    try:
+        _stage(report.assets, source, workdir, store)
+        os.chdir(workdir)
+        pdf = report.output(cache_dir=cache_dir)
+        target = os.path.join(output_dir, name + ".pdf")
+        shutil.copyfile(os.path.join(workdir, pdf), target)
+        return RenderResult(
+            index,
+            report.title,
+            target,
+            time.perf_counter() - start,
+            passes=report.compileResult.passes,
+        )
+    except Exception:
+        return RenderResult(
+            index,
+            report.title,
+            None,
+            time.perf_counter() - start,
+            traceback.format_exc(),
+        )
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def render_many(
+    reports, workers=None, output_dir=None, cache_dir=None, asset_dir=None
+) -> List[RenderResult]:
+    """Compile many reports in parallel, one isolated build directory each.
+
+    Failures are captured per document instead of aborting the batch. Results
+    are returned in the order of ``reports``. Assets are linked into the build
+    directories from an `AssetStore` in ``asset_dir``.
+    """
+    source = os.getcwd()
+    output_dir = os.path.abspath(output_dir or source)
+    # Each report is built from inside its temporary directory
+    if cache_dir is not None:
+        cache_dir = os.path.abspath(cache_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Store every asset up front so the workers receive the digests with the
+    # store and never hash a file again
+    store = AssetStore(asset_dir)
+    for report in reports:
+        for _, path in _assetPaths(report.assets, source):
+            store.put(path)
+
+    # Reports sharing a title would overwrite each other's PDF
+    names = [report.outputName() for report in reports]
+    duplicates = {name for name in names if names.count(name) > 1}
+    names = [
+        f"{name}-{index}" if name in duplicates else name
+        for index, name in enumerate(names)
+    ]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                _render, index, report, name, source, output_dir, cache_dir, store
+            )
+            for index, (report, name) in enumerate(zip(reports, names))
+        ]
+        for index, future in enumerate(futures):
+            try:
+                result = future.result()
+            except Exception:
+                # The worker itself died (e.g. the report could not be pickled)
+                result = RenderResult(
+                    index, reports[index].title, None, 0.0, traceback.format_exc()
+                )
+            if not result.ok:
+                logger.warning("Rendering {!r} failed", result.title)
+            results.append(result)
+
+    return results
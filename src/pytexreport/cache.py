@@ -0,0 +1,49 @@
+import hashlib
+import os
+import shutil
+
+
+class BuildCache:
+    """Content-addressed store of compiled PDFs.
+
+    A build is keyed on the bytes of the rendered ``.tex`` file and of every
+    file it pulls in (class file, images, bibliography), so an unchanged
+    document can skip TeX entirely.
+    """
+
+    def __init__(self, directory=None):
+        if directory is None:
+            directory = os.path.join(os.path.expanduser("~"), ".cache", "pytexreport")
+        self.directory = directory
+
+    def key(self, files, options=()):
+        # ``options`` are settings that change the PDF, such as the engine
+        digest = hashlib.sha256()
+        for option in options:
+            digest.update(b"\0" + str(option).encode() + b"\0")
+        for path in files:
+            digest.update(b"\0" + os.fsencode(path) + b"\0")
+            if os.path.isfile(path):
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b""):
+                        digest.update(chunk)
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".pdf")
+
+    def get(self, key, destination):
+        cached = self.path(key)
+        if not os.path.isfile(cached):
+            return False
+        shutil.copyfile(cached, destination)
+        return True
+
+    def put(self, key, source):
+        cached = self.path(key)
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        # Write under a private name first so concurrent builds never see a
+        # half-copied PDF.
+        partial = f"{cached}.{os.getpid()}.tmp"
+        shutil.copyfile(source, partial)
+        os.replace(partial, cached)
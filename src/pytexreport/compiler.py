@@ -0,0 +1,413 @@
+import asyncio
+import hashlib
+import os
+import re
+import shutil
+import signal
+import subprocess
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Optional
+
+from loguru import logger
+from pylatex.errors import CompilerError
+from pylatex.utils import rm_temp_dir
+
+# Files whose content decides whether another pass can change the output
+AUX_EXTENSIONS = ("aux", "toc", "lof", "lot", "out", "bcf", "bbl")
+
+# Lines of the main .aux that read the .aux of an \include'd file
+_INPUT = re.compile(r"\\@input\{(.+?)\}")
+
+CLEAN_EXTENSIONS = AUX_EXTENSIONS + ("log", "blg", "run.xml", "fls", "fdb_latexmk")
+
+# Async compiles run in their own process group where there are groups to kill
+_NEW_SESSION = hasattr(os, "killpg")
+
+# Compile events are silent unless the application opts in with
+# logger.enable("pytexreport.compiler")
+logger.disable(__name__)
+
+
+# Lines of engine output kept in the message of an EngineError
+ERROR_LINES = 50
+
+
+class EngineError(subprocess.CalledProcessError):
+    """A failed engine run.
+
+    The message ends with the last ``ERROR_LINES`` lines of the engine's
+    output, since compile logging is disabled by default; ``output`` holds
+    all of it.
+    """
+
+    def __str__(self):
+        output = self.output.decode(errors="replace").splitlines()
+        return "\n".join([super().__str__()] + output[-ERROR_LINES:])
+
+
+@dataclass
+class CompileResult:
+    passes: int = 0
+    bibliographyRuns: int = 0
+
+
+@dataclass(frozen=True)
+class Engine:
+    """How the compile driver runs a TeX engine.
+
+    ``draft`` is the option that skips writing the PDF, used on every pass
+    but the last one with ``compile_tex(draft=True)``. Engines that rerun
+    themselves until done (``converges=False``) are called once.
+    """
+
+    name: str
+    draft: Optional[str] = None
+    formats: bool = True
+    converges: bool = True
+
+
+ENGINES = {
+    engine.name: engine
+    for engine in (
+        Engine("pdflatex", draft="-draftmode"),
+        Engine("lualatex", draft="--draftmode"),
+        Engine("xelatex", draft="-no-pdf"),
+        Engine("tectonic", formats=False, converges=False),
+        Engine("latexmk", converges=False),
+    )
+}
+
+
+def register_engine(engine):
+    """Make ``engine`` available to `compile_tex` under its name."""
+    ENGINES[engine.name] = engine
+
+
+def get_engine(compiler=None):
+    # Unregistered names run like pdflatex, without a draft mode
+    if isinstance(compiler, Engine):
+        return compiler
+    compiler = compiler or "pdflatex"
+    return ENGINES.get(compiler) or Engine(compiler)
+
+
+def compile_tex(
+    filepath,
+    compiler=None,
+    compiler_args=None,
+    clean=True,
+    fmt=None,
+    max_passes=5,
+    env=None,
+    draft=False,
+):
+    """Compile ``filepath + ".tex"`` into a PDF next to it.
+
+    The engine (pdflatex unless ``compiler`` names another or is an `Engine`)
+    is rerun only until the auxiliary files stop changing, and biber/bibtex
+    only when the set of citations changes. With ``draft`` those passes skip
+    the PDF and one final pass writes it. ``compiler="latexmk"`` or
+    ``"tectonic"`` hand the whole job to that tool instead. ``fmt`` is a
+    precompiled preamble format to start from and ``env`` the environment to
+    run the tools in.
+    """
+    filepath = os.path.abspath(filepath)
+    result = CompileResult()
+    commands = _commands(
+        filepath, result, compiler, compiler_args, fmt, max_passes, draft
+    )
+    for command in commands:
+        _run(command, os.path.dirname(filepath), env)
+    return _finish(filepath, result, clean)
+
+
+async def compile_tex_async(
+    filepath,
+    compiler=None,
+    compiler_args=None,
+    clean=True,
+    fmt=None,
+    max_passes=5,
+    timeout=None,
+    env=None,
+    draft=False,
+):
+    """Like `compile_tex`, but runs the commands as asyncio subprocesses.
+
+    At most `set_compile_limit` compiles run at once per event loop. When
+    ``timeout`` expires (raising `asyncio.TimeoutError`) or the task is
+    cancelled, the running TeX process is killed.
+    """
+    filepath = os.path.abspath(filepath)
+    result = CompileResult()
+    commands = _commands(
+        filepath, result, compiler, compiler_args, fmt, max_passes, draft
+    )
+    async with _semaphore():
+        await asyncio.wait_for(
+            _runAll(commands, os.path.dirname(filepath), env), timeout
+        )
+    return _finish(filepath, result, clean)
+
+
+def select_engine(filepath, candidates=None, env=None, draft=False, runs=2):
+    """Return the name of the engine that compiles ``filepath + ".tex"`` fastest.
+
+    Each installed candidate, by default every registered engine but
+    latexmk, compiles the document once to warm its font and package caches
+    and then ``runs`` more times from a clean state; the fastest of those
+    runs counts. Engines that fail on the document are skipped.
+    """
+    filepath = os.path.abspath(filepath)
+    candidates = candidates or [name for name in ENGINES if name != "latexmk"]
+    timings = {}
+    for name in candidates:
+        if shutil.which(get_engine(name).name) is None:
+            continue
+        try:
+            _timeCompile(filepath, name, env, draft)
+            timings[name] = min(
+                _timeCompile(filepath, name, env, draft) for _ in range(runs)
+            )
+        except (CompilerError, subprocess.CalledProcessError):
+            logger.warning("{} could not compile {}.tex", name, filepath)
+
+    if not timings:
+        raise CompilerError(f"No engine could compile {filepath}.tex")
+    fastest = min(timings, key=timings.get)
+    logger.debug("Selected {} for {}.tex from {}", fastest, filepath, timings)
+    return fastest
+
+
+def _timeCompile(filepath, name, env, draft):
+    _clean(filepath)
+    start = time.perf_counter()
+    compile_tex(filepath, compiler=name, env=env, draft=draft)
+    return time.perf_counter() - start
+
+
+_compileLimit = os.cpu_count() or 1
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def set_compile_limit(limit):
+    """Set how many `compile_tex_async` calls may run at once."""
+    global _compileLimit
+    _compileLimit = limit
+    # Compiles already waiting keep the old semaphore
+    _semaphores.clear()
+
+
+def _semaphore():
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(_compileLimit)
+    return semaphore
+
+
+def _commands(filepath, result, compiler, compiler_args, fmt, max_passes, draft):
+    # Yields each command to run; the caller runs it before asking for the
+    # next one, so the same driver serves the blocking and the asyncio API
+    engine = get_engine(compiler)
+    if engine.name == "latexmk":
+        return _latexmk(filepath, result, compiler_args, fmt)
+    if not engine.converges:
+        return _once(filepath, result, engine, compiler_args)
+    return _converge(filepath, result, engine, compiler_args, fmt, max_passes, draft)
+
+
+def _finish(filepath, result, clean):
+    if clean:
+        _clean(filepath)
+
+    logger.debug(
+        "Compiled {}.tex in {} pass(es) and {} bibliography run(s)",
+        filepath,
+        result.passes,
+        result.bibliographyRuns,
+    )
+    return result
+
+
+def _missing(command):
+    return CompilerError(
+        f"No LaTex compiler was found\n"
+        f"Make sure {command[0]} is installed and on the PATH."
+    )
+
+
+def _run(command, cwd, env=None):
+    try:
+        subprocess.check_output(command, stderr=subprocess.STDOUT, cwd=cwd, env=env)
+    except FileNotFoundError:
+        raise _missing(command) from None
+    except subprocess.CalledProcessError as e:
+        logger.error(e.output.decode(errors="replace"))
+        raise EngineError(e.returncode, command, e.output) from None
+
+
+async def _runAll(commands, cwd, env=None):
+    for command in commands:
+        await _runAsync(command, cwd, env)
+
+
+def _kill(process):
+    # Wrappers such as latexmk run the engine as a grandchild that would keep
+    # the output pipe open, so the whole process group is killed
+    if _NEW_SESSION:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    else:
+        process.kill()
+
+
+async def _runAsync(command, cwd, env=None):
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            cwd=cwd,
+            env=env,
+            start_new_session=_NEW_SESSION,
+        )
+    except FileNotFoundError:
+        raise _missing(command) from None
+
+    try:
+        output, _ = await process.communicate()
+    except asyncio.CancelledError:
+        _kill(process)
+        await process.wait()
+        raise
+
+    if process.returncode:
+        logger.error(output.decode(errors="replace"))
+        raise EngineError(process.returncode, command, output)
+
+
+def _latexmk(filepath, result, compiler_args=None, fmt=None):
+    arguments = ["--pdf"]
+    if fmt is not None:
+        arguments.append(f"-pdflatex=pdflatex -fmt={fmt} %O %S")
+    yield (
+        ["latexmk"]
+        + arguments
+        + list(compiler_args or [])
+        + ["--interaction=nonstopmode", filepath + ".tex"]
+    )
+    result.passes = 1
+
+
+def _once(filepath, result, engine, compiler_args=None):
+    yield [engine.name] + list(compiler_args or []) + [filepath + ".tex"]
+    result.passes = 1
+
+
+def _converge(
+    filepath, result, engine, compiler_args=None, fmt=None, max_passes=5, draft=False
+):
+    options = list(compiler_args or [])
+    if fmt is not None and engine.formats:
+        options.append(f"-fmt={fmt}")
+    command = [engine.name] + options + ["--interaction=nonstopmode", filepath + ".tex"]
+    passCommand = command
+    if draft and engine.draft is not None:
+        passCommand = [engine.name, engine.draft] + command[1:]
+
+    state = _auxState(filepath)
+    bibliography = None
+    while result.passes < max_passes:
+        yield passCommand
+        result.passes += 1
+        previous, state = state, _auxState(filepath)
+
+        citations = _citations(filepath)
+        if citations is not None and citations[1] != bibliography:
+            tool, bibliography = citations
+            yield [tool, os.path.basename(filepath)]
+            result.bibliographyRuns += 1
+            continue
+
+        if state == previous:
+            break
+    else:
+        logger.warning("{}.tex did not converge within {} passes", filepath, max_passes)
+
+    # Draft passes wrote no PDF
+    if passCommand is not command:
+        yield command
+        result.passes += 1
+
+
+def _digest(path):
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def _auxFiles(filepath):
+    # The .aux files of \include'd parts, which the main .aux \@input's
+    files = []
+    try:
+        with open(filepath + ".aux", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                match = _INPUT.match(line)
+                if match is not None:
+                    path = os.path.join(os.path.dirname(filepath), match.group(1))
+                    files.append(path)
+    except FileNotFoundError:
+        pass
+    return files
+
+
+def _auxState(filepath):
+    state = [_digest(f"{filepath}.{ext}") for ext in AUX_EXTENSIONS]
+    state += [_digest(path) for path in _auxFiles(filepath)]
+    return tuple(state)
+
+
+def _citations(filepath):
+    # Returns the bibliography tool and a fingerprint of what it would read,
+    # or None when the document cites nothing
+    if os.path.isfile(filepath + ".bcf"):
+        tool, sources = "biber", [filepath + ".bcf"]
+        markers, citing = ("<bcf:citekey", "<bcf:datasource"), "<bcf:citekey"
+    elif os.path.isfile(filepath + ".aux"):
+        tool, sources = "bibtex", [filepath + ".aux"] + _auxFiles(filepath)
+        markers = ("\\citation", "\\bibdata", "\\bibstyle")
+        citing = "\\citation"
+    else:
+        return None
+
+    lines = []
+    for source in sources:
+        if os.path.isfile(source):
+            with open(source, encoding="utf-8", errors="replace") as f:
+                lines += [
+                    line.strip() for line in f if line.lstrip().startswith(markers)
+                ]
+    if not any(line.startswith(citing) for line in lines):
+        return None
+    return tool, hashlib.sha256("\n".join(lines).encode()).hexdigest()
+
+
+def _clean(filepath):
+    for path in _auxFiles(filepath):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    for ext in CLEAN_EXTENSIONS:
+        try:
+            os.remove(filepath + "." + ext)
+        except FileNotFoundError:
+            pass
+    rm_temp_dir()
@@ -0,0 +1,96 @@
+import functools
+import hashlib
+import importlib.metadata
+import marshal
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+
+@functools.lru_cache(maxsize=None)
+def _latexifyVersion():
+    # latexify does not expose its version, so ask the installed distribution
+    try:
+        return importlib.metadata.version("latexify-py")
+    except importlib.metadata.PackageNotFoundError:
+        return ""
+
+
+class EquationCache:
+    """Memoizes the LaTeX that latexify produces for Python functions.
+
+    Entries are keyed on the function's code object and the latexify options.
+    The ``maxsize`` most recently used are kept in memory; with ``directory``
+    every entry is also stored on disk and reused by later processes.
+    """
+
+    def __init__(self, maxsize=256, directory=None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Code objects cannot be pickled, so copies start with an empty LRU
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["entries"] = OrderedDict()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get(self, function, options=None):
+        options = options or {}
+        # Option values such as identifier maps are not hashable
+        tag = repr(sorted(options.items()))
+        key = (function.__code__, tag)
+
+        with self._lock:
+            latex = self.entries.get(key)
+            if latex is not None:
+                self.entries.move_to_end(key)
+                return latex
+
+        latex = self._load(function, options, tag)
+        with self._lock:
+            self.entries[key] = latex
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return latex
+
+    def _load(self, function, options, tag):
+        import latexify
+
+        if self.directory is None:
+            return latexify.get_latex(function, **options)
+
+        # Code objects marshal identically only within one Python version
+        digest = hashlib.sha256(marshal.dumps(function.__code__))
+        digest.update(f"{sys.version}:{_latexifyVersion()}:{tag}".encode())
+        path = os.path.join(self.directory, digest.hexdigest() + ".tex")
+        try:
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            pass
+
+        latex = latexify.get_latex(function, **options)
+        os.makedirs(self.directory, exist_ok=True)
+        partial = f"{path}.{os.getpid()}.tmp"
+        with open(partial, "w", encoding="utf-8") as f:
+            f.write(latex)
+        os.replace(partial, path)
+        return latex
+
+
+_defaultEquationCache = None
+
+
+def defaultEquationCache():
+    global _defaultEquationCache
+    if _defaultEquationCache is None:
+        _defaultEquationCache = EquationCache()
+    return _defaultEquationCache
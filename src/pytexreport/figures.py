@@ -0,0 +1,110 @@
+import hashlib
+import io
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+from matplotlib.cbook import CallbackRegistry
+from matplotlib.figure import Figure, _AxesStack
+from matplotlib.transforms import TransformNode
+
+# Figure state set by pyplot's figure manager: the figure number and whether
+# the figure is registered with pyplot
+_MANAGER_STATE = ("number", "_number", "_restore_to_pylab")
+
+
+class _Fingerprinter(pickle.Pickler):
+    # Pickles a figure without the bookkeeping that differs between otherwise
+    # identical figures: the pyplot figure number, transform back-references
+    # keyed by id(), callback ids and the absolute axes counters. None of it
+    # affects the drawing.
+    def reducer_override(self, obj):
+        if isinstance(obj, CallbackRegistry):
+            return CallbackRegistry, ()
+        if isinstance(obj, (Figure, TransformNode, _AxesStack)):
+            reduced = obj.__reduce_ex__(pickle.HIGHEST_PROTOCOL)
+            state = dict(reduced[2])
+            state.pop("_parents", None)
+            if isinstance(obj, Figure):
+                for name in _MANAGER_STATE:
+                    state.pop(name, None)
+            if isinstance(obj, _AxesStack):
+                order = sorted(state["_axes"], key=state["_axes"].get)
+                state["_axes"] = {ax: i for i, ax in enumerate(order)}
+                state.pop("_counter", None)
+            return (reduced[0], reduced[1], state) + tuple(reduced[3:])
+        return NotImplemented
+
+
+def fingerprint(figure, dpi, extension):
+    buffer = io.BytesIO()
+    _Fingerprinter(buffer, pickle.HIGHEST_PROTOCOL).dump(figure)
+    digest = hashlib.sha256(buffer.getvalue())
+    digest.update(f"{dpi}:{extension}".encode())
+    return digest.hexdigest()
+
+
+def _render(data, path, dpi):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    # A figure pickled from pyplot registers itself again with this worker's
+    # pyplot when it is loaded, so it has to be closed here
+    figure = pickle.loads(data)
+    try:
+        partial = f"{path}.{os.getpid()}.tmp{os.path.splitext(path)[1]}"
+        figure.savefig(partial, dpi=dpi)
+        os.replace(partial, path)
+    finally:
+        plt.close(figure)
+
+
+class FigureRenderer:
+    """Saves matplotlib figures on a process pool, once per distinct figure.
+
+    Figures are pickled when they are added and written to
+    ``directory/<fingerprint>.<extension>``, so an identical plot in any
+    report, in this process or a later one, is rendered only once.
+    """
+
+    def __init__(self, directory=None, workers=None):
+        if directory is None:
+            directory = os.path.join(
+                os.path.expanduser("~"), ".cache", "pytexreport", "figures"
+            )
+        self.directory = directory
+        self.workers = workers
+        self.pool = None
+        self.pending = {}
+
+    def submit(self, figure, dpi=300, extension="pdf"):
+        extension = extension.strip(".")
+        key = fingerprint(figure, dpi, extension)
+        path = os.path.join(self.directory, f"{key}.{extension}")
+
+        future = self.pending.get(path)
+        if future is None and not os.path.isfile(path):
+            if self.pool is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self.pool = ProcessPoolExecutor(max_workers=self.workers)
+            future = self.pool.submit(_render, pickle.dumps(figure), path, dpi)
+            self.pending[path] = future
+            future.add_done_callback(lambda _: self.pending.pop(path, None))
+        return path, future
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+
+_defaultRenderer = None
+
+
+def defaultRenderer():
+    global _defaultRenderer
+    if _defaultRenderer is None:
+        _defaultRenderer = FigureRenderer()
+    return _defaultRenderer
@@ -0,0 +1,109 @@
+import hashlib
+import os
+import shutil
+import subprocess
+
+from loguru import logger
+from pylatex import NoEscape
+
+# Everything before this line is dumped into the format; per-document
+# definitions after it are still read on every run. Without a format it
+# expands to \relax.
+ENDOFDUMP = NoEscape(r"\csname endofdump\endcsname")
+
+# Silent unless the application opts in with logger.enable("pytexreport.formats")
+logger.disable(__name__)
+
+
+class PreambleFormats:
+    """Precompiled preamble formats, built with mylatexformat.
+
+    The part of a document's preamble before `ENDOFDUMP` is dumped once into
+    ``directory/<hash>.fmt`` and reused by every later build with the same
+    preamble, class file and TeX engine.
+    """
+
+    def __init__(self, directory=None, engine="pdflatex"):
+        if directory is None:
+            directory = os.path.join(
+                os.path.expanduser("~"), ".cache", "pytexreport", "formats"
+            )
+        self.directory = directory
+        self.engine = engine
+
+    def key(self, filepath, files=()):
+        executable = shutil.which(self.engine)
+        if executable is None:
+            return None
+
+        # Formats only load in the exact binary that dumped them
+        digest = hashlib.sha256()
+        identity = f"{self.engine}:{executable}:{os.stat(executable).st_mtime_ns}"
+        digest.update(identity.encode())
+
+        with open(filepath + ".tex", "rb") as f:
+            for line in f:
+                if line.startswith(ENDOFDUMP.encode()):
+                    break
+                digest.update(line)
+            else:
+                return None
+
+        for path in files:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        return digest.hexdigest()
+
+    def get(self, filepath, files=(), env=None):
+        """Return the format for ``filepath + ".tex"``, building it if needed.
+
+        Returns the format path without ``.fmt`` (as ``-fmt`` expects), or
+        None when no format can be used and the document should be compiled
+        normally. ``env`` is the environment to run the engine in.
+        """
+        key = self.key(filepath, files)
+        if key is None:
+            return None
+
+        fmt = os.path.join(os.path.abspath(self.directory), key)
+        if os.path.isfile(fmt + ".fmt"):
+            return fmt
+
+        try:
+            self._build(filepath, key, env)
+        except (OSError, subprocess.CalledProcessError):
+            logger.warning("Could not precompile the preamble of {}.tex", filepath)
+            return None
+        return fmt
+
+    def _build(self, filepath, key, env=None):
+        directory = os.path.abspath(self.directory)
+        os.makedirs(directory, exist_ok=True)
+        filepath = os.path.abspath(filepath)
+
+        # Dump under a private job name so concurrent builds of the same
+        # format never read a partial file
+        jobname = f"{key}-{os.getpid()}"
+        subprocess.check_output(
+            [
+                self.engine,
+                "-ini",
+                "-interaction=nonstopmode",
+                f"-output-directory={directory}",
+                f"-jobname={jobname}",
+                f"&{self.engine}",
+                "mylatexformat.ltx",
+                filepath + ".tex",
+            ],
+            stderr=subprocess.STDOUT,
+            cwd=os.path.dirname(filepath),
+            env=env,
+        )
+        os.replace(
+            os.path.join(directory, jobname + ".fmt"),
+            os.path.join(directory, key + ".fmt"),
+        )
+        try:
+            os.remove(os.path.join(directory, jobname + ".log"))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+
+@dataclass
+class ProfileEntry:
+    calls: int = 0
+    seconds: float = 0.0
+    bytes: int = 0
+
+
+class BuildProfile:
+    """Wall time, call counts and bytes produced while building a report.
+
+    Builder methods are recorded under their own name in ``methods`` and the
+    steps of ``output()`` in ``phases``. With ``trace=True`` every call is
+    also kept as an event for `toChromeTrace`.
+    """
+
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.methods = {}
+        self.phases = {}
+        self.events = []
+        self.origin = time.perf_counter()
+        self._open = []
+
+    def begin(self):
+        # Opens the entry that collects the bytes produced until end()
+        produced = ProfileEntry()
+        self._open.append(produced)
+        return produced
+
+    def end(self, name, start, phase=False):
+        # Records the call opened by begin() that started at perf_counter()
+        # time start
+        produced = self._open.pop()
+        self.record(name, start, produced.bytes, phase)
+
+    def record(self, name, start, produced=0, phase=False):
+        # Records a call that was not opened with begin(), such as one that
+        # spans awaits and must not sit on the stack of open calls
+        seconds = time.perf_counter() - start
+        entries = self.phases if phase else self.methods
+        entry = entries.get(name)
+        if entry is None:
+            entry = entries[name] = ProfileEntry()
+        entry.calls += 1
+        entry.seconds += seconds
+        entry.bytes += produced
+        if self.trace:
+            category = "phase" if phase else "method"
+            self.events.append(
+                (
+                    name,
+                    category,
+                    start - self.origin,
+                    seconds,
+                    produced,
+                    threading.get_ident(),
+                )
+            )
+
+    @contextmanager
+    def measure(self, name, phase=False):
+        # The yielded entry collects the bytes produced by the measured block
+        produced = self.begin()
+        start = time.perf_counter()
+        try:
+            yield produced
+        finally:
+            self.end(name, start, phase)
+
+    def addBytes(self, count):
+        # Credits LaTeX produced by the innermost measured call
+        if self._open:
+            self._open[-1].bytes += count
+
+    def toDict(self):
+        return {
+            "methods": {name: asdict(entry) for name, entry in self.methods.items()},
+            "phases": {name: asdict(entry) for name, entry in self.phases.items()},
+        }
+
+    def toJSON(self, path=None):
+        return _write(json.dumps(self.toDict(), indent=2), path)
+
+    def toChromeTrace(self, path=None):
+        """Export the traced events in the Chrome ``about:tracing`` format."""
+        events = [
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start * 1e6,
+                "dur": seconds * 1e6,
+                "pid": os.getpid(),
+                "tid": thread,
+                "args": {"bytes": produced},
+            }
+            for name, category, start, seconds, produced, thread in self.events
+        ]
+        return _write(json.dumps({"traceEvents": events}), path)
+
+
+def _write(text, path=None):
+    if path is not None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    return text
+
+
+def fileSize(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
@@ -9,14 +9,24 @@ containing data. It also creates a complex header with an image.
 """
 
 # begin-doc-include
+import asyncio
+import contextlib
+import functools
+import hashlib
+import importlib.util
+import io
+import json
 import os
 import re
 import shutil
+import sys
+import threading
+import time
 import types
+import weakref
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-import latexify
-import matplotlib
 from loguru import logger
 from pylatex import (
     Command,
@@ -31,91 +41,469 @@ from pylatex import (
     Subsubsection,
     Table,
 )
-from pylatex.base_classes import Arguments, Options
+from pylatex.base_classes import Arguments, Container, LatexObject, Options
+from pylatex.errors import TableRowSizeError
 from pylatex.lists import Description, Enumerate, Itemize
-from pylatex.table import Tabular
-from pylatex.utils import escape_latex
+from pylatex.table import LongTable, Tabular
+from pylatex.utils import dumps_list, escape_latex
 
-# Set the font to Computer Modern
-matplotlib.rcParams["font.family"] = "serif"
-matplotlib.rcParams["font.serif"] = ["Computer Modern"]
+from pytexreport.cache import BuildCache
+from pytexreport.compiler import (
+    CompileResult,
+    compile_tex,
+    compile_tex_async,
+    get_engine,
+    select_engine,
+)
+from pytexreport.equations import defaultEquationCache
+from pytexreport.formats import ENDOFDUMP, PreambleFormats
+from pytexreport.profiling import BuildProfile, ProfileEntry, fileSize
+from pytexreport.resources import texinputs
+from pytexreport.templates import Template, hasPlaceholder
+from pytexreport.worker import enqueue
 
+# Builder events are debug-level and silent unless the application opts in
+# with logger.enable("pytexreport.pytexreport")
+logger.disable(__name__)
 
-class PyTexReport:
-    presentSection = deque()
-    content = []
+_matplotlibConfigured = False
 
-    def __init__(self):
-        # Adding Package to allow notes
-        self.doc.packages.append(
-            Command(
-                "usepackage",
-                arguments=Arguments("xcolor"),
-                options=Options("table", "xcdraw", "dvipsnames"),
+
+def _configureMatplotlib():
+    global _matplotlibConfigured
+    if _matplotlibConfigured or "matplotlib" not in sys.modules:
+        return
+    import matplotlib
+
+    # Set the font to Computer Modern
+    matplotlib.rcParams["font.family"] = "serif"
+    matplotlib.rcParams["font.serif"] = ["Computer Modern"]
+    _matplotlibConfigured = True
+
+
+class _PostImportHook:
+    # Finder that calls callback right after the module called name runs,
+    # whoever imports it and whenever
+    def __init__(self, name, callback):
+        self.name = name
+        self.callback = callback
+        self.searching = False
+
+    def find_spec(self, name, path=None, target=None):
+        if name != self.name or self.searching:
+            return None
+        # Let the other finders locate the module, then wrap its loader
+        self.searching = True
+        try:
+            spec = importlib.util.find_spec(name)
+        finally:
+            self.searching = False
+        if spec is None or spec.loader is None:
+            return None
+
+        execModule = spec.loader.exec_module
+
+        def exec_module(module):
+            execModule(module)
+            self.callback()
+
+        spec.loader.exec_module = exec_module
+        return spec
+
+
+# matplotlib is only imported once a document needs it, but the report font
+# has to be set before anything is drawn, as it was when importing this module
+# imported matplotlib: now if it is loaded already, otherwise once it is
+_configureMatplotlib()
+sys.meta_path.insert(0, _PostImportHook("matplotlib", _configureMatplotlib))
+
+
+def synchronized(method):
+    # Builder methods mutate presentSection/content in several steps, so a
+    # report shared between threads must serialize them
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+# Same mapping as pylatex's escape_latex, usable with str.translate
+_LATEX_ESCAPES = str.maketrans(
+    {char: str(escape_latex(char)) for char in "&%$#_{}~^\\\n-\xa0[]"}
+)
+
+
+def _rowColumns(rows, width):
+    for row in rows:
+        if len(row) != width:
+            raise TableRowSizeError(
+                f"Number of cells added to table ({len(row)}) "
+                f"did not match table width ({width})"
             )
+    return [[row[i] for row in rows] for i in range(width)]
+
+
+def _tableColumns(data, nrow=None, header=None):
+    # Returns the raw column keys, the header cells and the body as columns
+    if nrow is not None and nrow < 1:
+        raise ValueError(
+            f"nrow counts the header row, so it must be at least 1, not {nrow}"
         )
-        # Captioning Equations
-        self.doc.packages.append(Command("usepackage", arguments=Arguments("float")))
-        self.doc.preamble.append(NoEscape(r"\usepackage{aliascnt}"))
-        self.doc.preamble.append(NoEscape(r"\newaliascnt{eqfloat}{equation}"))
-        self.doc.preamble.append(NoEscape(r"\newfloat{eqfloat}{h}{eqflts}"))
-        self.doc.preamble.append(NoEscape(r"\floatname{eqfloat}{Equation}"))
-
-        self.doc.preamble.append(NoEscape(r"\newcommand*{\ORGeqfloat}{}"))
-        self.doc.preamble.append(NoEscape(r"\let\ORGeqfloat\eqfloat"))
-        self.doc.preamble.append(NoEscape(r"\def\eqfloat{%"))
-        self.doc.preamble.append(NoEscape(r"\let\ORIGINALcaption\caption"))
-        self.doc.preamble.append(NoEscape(r"\def\caption{%"))
-        self.doc.preamble.append(NoEscape(r"\addtocounter{equation}{-1}%"))
-        self.doc.preamble.append(NoEscape(r"\ORIGINALcaption"))
-        self.doc.preamble.append(NoEscape(r"}%"))
-        self.doc.preamble.append(NoEscape(r"\ORGeqfloat"))
-        self.doc.preamble.append(NoEscape(r"}"))
+    if isinstance(data, dict):
+        keys = list(data)
+        columns = [list(column) for column in data.values()]
+    elif hasattr(data, "columns") and hasattr(data, "iloc"):
+        keys = list(data.columns)
+        columns = [data.iloc[:, i].tolist() for i in range(len(keys))]
+    elif header is None and not hasattr(data, "tolist"):
+        # Header cells of a row list are LaTeX, as they always have been
+        rows = list(data[:nrow] if nrow is not None else data)
+        keys = [str(item) for item in rows[0]]
+        return keys, keys, _rowColumns(rows[1:], len(keys))
+    else:
+        # Every row of an array is data; its columns are numbered unless
+        # header names them
+        rows = data.tolist() if hasattr(data, "tolist") else list(data)
+        keys = list(range(len(rows[0]) if rows else len(header or ())))
+        columns = _rowColumns(rows, len(keys))
 
-        # Enum Items
-        self.doc.packages.append(
-            Command("usepackage", arguments=Arguments("enumitem")),
+    if header is None:
+        header = keys
+    if len(header) != len(keys):
+        raise TableRowSizeError(
+            f"Number of header cells ({len(header)}) "
+            f"did not match table width ({len(keys)})"
         )
+    if len({len(column) for column in columns}) > 1:
+        raise TableRowSizeError("Table columns must all have the same length")
+    if nrow is not None:
+        columns = [column[: nrow - 1] for column in columns]
+    return keys, [escape_latex(str(title)) for title in header], columns
 
-    def flush(self, level=0):
-        logger.info(self.presentSection)
-        logger.info(self.content)
 
-        if len(self.content) < 1:
-            return
-        if len(self.presentSection) < 1:
-            if len(self.content) > 0:
-                for item in self.content:
-                    self.doc.append(item)
+def _formatColumns(keys, columns, formats=None):
+    # formats is one format spec for every column, a list with one spec per
+    # column or a dict keyed by column key or index; None means str()
+    for i, (key, column) in enumerate(zip(keys, columns)):
+        if isinstance(formats, dict):
+            spec = formats.get(key, formats.get(i))
+        elif isinstance(formats, (list, tuple)):
+            spec = formats[i]
         else:
-            last = self.presentSection.pop()
-            if len(self.content) > 0:
-                for item in self.content:
-                    last.append(item)
-                self.content = []
+            spec = formats
+
+        if spec is None:
+            cells = map(str, column)
+        else:
+            cells = map(("{:" + spec + "}").format, column)
+        yield [cell.translate(_LATEX_ESCAPES) for cell in cells]
+
+
+def _longTable(tabsize, header, body, caption=None, label=None):
+    table = LongTable(tabsize)
+
+    rows = []
+    if caption is not None or label is not None:
+        first = ""
+        if caption is not None:
+            first += Command("caption", caption).dumps()
+        if label is not None:
+            first += Label(f"tab: {label}").dumps()
+        rows.append(first + r"\\")
+
+    # Header row on the first page and repeated on every following one
+    head = [r"\hline", header, r"\hline"]
+    rows += head + [r"\endfirsthead"] + head + [r"\endhead"]
+    for row in body:
+        rows.append(row)
+        rows.append(r"\hline")
+    table.append(NoEscape("%\n".join(rows)))
+
+    return table
+
+
+def fragment(*latex):
+    # One node that renders exactly like the parts appended one by one, so a
+    # builder call adds a single object to the tree instead of several
+    return NoEscape("%\n".join(latex))
+
+
+def _digestText(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _writeSection(path, section):
+    # An unchanged file is left alone, so its timestamp and the compile state
+    # that depends on it stay valid
+    latex = section.dumps()
+    try:
+        with open(path, encoding="utf-8") as f:
+            if _digestText(f.read()) == _digestText(latex):
+                return False
+    except FileNotFoundError:
+        pass
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(latex)
+    return True
+
+
+def _closeStream(stream, writer):
+    # Finalizer of a streaming report; see enableStreaming()
+    if writer is not None:
+        writer.shutdown()
+    stream.close()
+    try:
+        os.remove(stream.name)
+    except FileNotFoundError:
+        pass
+
+
+def _checkTitle(title):
+    # Section labels are derived from the title, so a template could not give
+    # each variant its own label
+    if hasPlaceholder(title):
+        raise ValueError("Section titles cannot contain template placeholders")
+
+
+def profiled(method):
+    # Records the call in the report's BuildProfile under the method name,
+    # when profiling is enabled; otherwise it only costs the None check
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        profile = self.profile
+        if profile is None:
+            return method(self, *args, **kwargs)
+        profile.begin()
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            profile.end(name, start)
+
+    return wrapper
+
+
+@functools.lru_cache(maxsize=None)
+def _basePreamble():
+    # Built once per process and shared by reference; the nodes are never
+    # modified after this, so reports only hold pointers to them
+    packages = (
+        # Adding Package to allow notes
+        Command(
+            "usepackage",
+            arguments=Arguments("xcolor"),
+            options=Options("table", "xcdraw", "dvipsnames"),
+        ),
+        # Captioning Equations
+        Command("usepackage", arguments=Arguments("float")),
+        # Enum Items
+        Command("usepackage", arguments=Arguments("enumitem")),
+    )
+    preamble = fragment(
+        r"\usepackage{aliascnt}",
+        r"\newaliascnt{eqfloat}{equation}",
+        r"\newfloat{eqfloat}{h}{eqflts}",
+        r"\floatname{eqfloat}{Equation}",
+        r"\newcommand*{\ORGeqfloat}{}",
+        r"\let\ORGeqfloat\eqfloat",
+        r"\def\eqfloat{%",
+        r"\let\ORIGINALcaption\caption",
+        r"\def\caption{%",
+        r"\addtocounter{equation}{-1}%",
+        r"\ORIGINALcaption",
+        r"}%",
+        r"\ORGeqfloat",
+        r"}",
+    )
+    return packages, preamble
+
+
+class PyTexReport:
+    # Compile defaults, overridden per style or per report; see
+    # compiler.ENGINES and selectEngine()
+    engine = "pdflatex"
+    draftmode = False
+
+    def __init__(self):
+        # Document builder state, kept per instance so reports never share
+        # pending sections or content
+        self.presentSection = deque()
+        self.content = []
+        self._lock = threading.RLock()
+
+        # Timings of builder methods and output() phases, see
+        # enableProfiling()
+        self.profile = None
+
+        # Files referenced by the document, hashed by the build cache
+        self.assets = []
+
+        # Open body file while streaming, see enableStreaming()
+        self.stream = None
+
+        # Figures still being saved by addMatplot; None uses the shared
+        # renderer so plots are deduplicated across reports
+        self.figureRenderer = None
+        self.pendingFigures = []
+
+        # LaTeX of functions passed to addEquation; None uses the shared
+        # in-memory cache
+        self.equationCache = None
+
+        # Passes the last output() needed, see compiler.compile_tex()
+        self.compileResult = None
+
+        # Packages and the eqfloat preamble are shared with every report
+        packages, preamble = _basePreamble()
+        self.doc.packages |= packages
+        self.doc.preamble.append(preamble)
+
+    def __getstate__(self):
+        # Futures and process pools cannot be pickled, so finish saving the
+        # figures first; the copy only needs the files
+        self.waitForFigures()
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["figureRenderer"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    @synchronized
+    def enableProfiling(self, trace=False):
+        """Record wall time, call counts and bytes of the report's build.
+
+        Builder methods and the phases of ``output()`` are recorded from now
+        on in a `BuildProfile`, which is kept on ``profile`` and returned.
+        Profiling is off by default, as it costs more than the cheapest
+        builder methods themselves.
+        """
+        self.profile = BuildProfile(trace=trace)
+        return self.profile
+
+    def _measure(self, name, phase=True):
+        if self.profile is None:
+            return contextlib.nullcontext(ProfileEntry())
+        return self.profile.measure(name, phase)
+
+    def waitForFigures(self):
+        for future in self.pendingFigures:
+            future.result()
+        self.pendingFigures = []
 
-            if len(self.presentSection) > level:
-                for item in range(level, len(self.presentSection)):
-                    current = self.presentSection.pop()
-                    current.append(last)
-                    last = current
+    @synchronized
+    @profiled
+    def flush(self, level=0):
+        # Only counts are logged, and only evaluated when debug logging for
+        # this module is enabled
+        logger.opt(lazy=True).debug(
+            "flush level={} open sections={} pending items={}",
+            lambda: level,
+            lambda: len(self.presentSection),
+            lambda: len(self.content),
+        )
+
+        # Pending content belongs to the innermost open section
+        target = self.presentSection[-1] if self.presentSection else self.doc
+        for item in self.content:
+            target.append(item)
+        self.content = []
+
+        # Close every section nested at or below the requested level
+        while len(self.presentSection) > level:
+            current = self.presentSection.pop()
+            parent = self.presentSection[-1] if self.presentSection else self.doc
+            parent.append(current)
+
+        if self.stream is not None and not self.presentSection:
+            self._drain()
+
+    @synchronized
+    @profiled
+    def enableStreaming(self, split_sections=False):
+        # Closed top-level sections are written to disk and dropped instead of
+        # being kept in the Document until output(). With split_sections each
+        # one goes to its own file, written on a thread pool and pulled in
+        # with \include; files whose content is unchanged are not rewritten.
+        # The body file is kept, so the report can be rendered any number of
+        # times, until the report is garbage collected or the process exits.
+        self.stream = open(self.outputName() + ".body.tex", "w", encoding="utf-8")
+        self.streamedItems = 0
+        self.sectionFiles = []
+        self.sectionWriter = ThreadPoolExecutor() if split_sections else None
+        weakref.finalize(self, _closeStream, self.stream, self.sectionWriter)
+        self._drain()
+
+    def _drain(self):
+        for item in self.doc.data:
+            # Packages are normally collected from the tree at dumps() time,
+            # so take them now before the objects are dropped
+            if isinstance(item, LatexObject):
+                if isinstance(item, Container):
+                    item._propagate_packages()
+                for package in item.packages:
+                    self.doc.packages.add(package)
+            if self.sectionWriter is not None and type(item) is Section:
+                item = self._splitSection(item)
+            if self.streamedItems > 0:
+                self.stream.write(self.doc.content_separator)
+            latex = dumps_list([item], escape=self.doc.escape)
+            self.stream.write(latex)
+            if self.profile is not None:
+                self.profile.addBytes(len(latex))
+            self.streamedItems += 1
+        del self.doc.data[:]
+
+    def _splitSection(self, section):
+        name = f"{self.outputName()}-{len(self.sectionFiles) + 1}"
+        self.sectionFiles.append(
+            self.sectionWriter.submit(_writeSection, name + ".tex", section)
+        )
+        return NoEscape(r"\include{" + name + "}")
 
-            if level == 0:
-                self.doc.append(last)
-            else:
-                self.presentSection[level - 1].append(last)
+    def _writeStream(self, out):
+        # The stream stays open, so the report can keep streaming and be
+        # rendered again
+        self._drain()
+        self.stream.flush()
+        for future in self.sectionFiles:
+            future.result()
 
-        logger.info(self.content)
+        marker = NoEscape("%pytexreport-stream-body%")
+        self.doc.append(marker)
+        try:
+            head, tail = self.doc.dumps().split(marker)
+        finally:
+            del self.doc.data[:]
 
+        out.write(head)
+        with open(self.stream.name, encoding="utf-8") as f:
+            shutil.copyfileobj(f, out)
+        out.write(tail)
+
+    @synchronized
+    @profiled
     def createNewPage(self):
         self.content.append(NewPage())
 
+    @synchronized
+    @profiled
     def createNewLine(self):
         self.content.append("")
 
+    @synchronized
+    @profiled
     def addLineBreak(self):
         self.content.append(LineBreak())
 
+    @synchronized
+    @profiled
     def addVSpace(self, size="medium"):
         if size == "small":
             self.content.append(NoEscape(r"\smallskip"))
@@ -124,21 +512,32 @@ class PyTexReport:
         if size == "large":
             self.content.append(NoEscape(r"\largelskip"))
 
+    @synchronized
+    @profiled
     def createSection(self, title, numbering=None):
+        _checkTitle(title)
         self.flush(0)
         self.section = Section(title, numbering=numbering)
         self.presentSection.append(self.section)
 
+    @synchronized
+    @profiled
     def createSubSection(self, title, numbering=None):
+        _checkTitle(title)
         self.flush(1)
         self.subsection = Subsection(title, numbering=numbering)
         self.presentSection.append(self.subsection)
 
+    @synchronized
+    @profiled
     def createSubSubSection(self, title, numbering=None):
+        _checkTitle(title)
         self.flush(2)
         self.subsubsection = Subsubsection(title, numbering=numbering)
         self.presentSection.append(self.subsubsection)
 
+    @synchronized
+    @profiled
     def addText(self, text, color=None, new_paragraph=True):
         if text[0] == "#":
             text = text[1:]
@@ -154,11 +553,16 @@ class PyTexReport:
         if color is not None:
             text = NoEscape(r"\textcolor{" + color + "}{" + text + "}")
 
-        self.content.append(NoEscape(text))
-
+        if self.profile is not None:
+            self.profile.addBytes(len(text))
         if new_paragraph:
-            self.createNewLine()
+            # Same output as a following createNewLine()
+            self.content.append(fragment(text, ""))
+        else:
+            self.content.append(NoEscape(text))
 
+    @synchronized
+    @profiled
     def addList(self, lists, type=1):
         if type < 3:
             if type == 1:
@@ -175,38 +579,85 @@ class PyTexReport:
 
         self.content.append(items)
 
-    def addTable(self, caption=None, label=None, data=None, nrow=None, ncol=None):
-        table = Table(position="H")
+    @synchronized
+    @profiled
+    def addTable(
+        self,
+        caption=None,
+        label=None,
+        data=None,
+        nrow=None,
+        ncol=None,
+        formats=None,
+        longtable=None,
+        chunk_size=None,
+        header=None,
+    ):
+        # data may be a list of rows (first row is the header), a 2D NumPy
+        # array, a pandas DataFrame or a dict of columns. header gives the
+        # column titles, escaped; with it, or for an array, every row of data
+        # is a body row, and array columns without it are numbered from 0.
+        keys, header, columns = _tableColumns(data, nrow, header)
+        if ncol is None:
+            ncol = len(header)
+        if len(header) != ncol:
+            raise TableRowSizeError(
+                f"Number of cells added to table ({len(header)}) "
+                f"did not match table width ({ncol})"
+            )
 
         tabsize = "|" + "|".join(["c"] * ncol) + "|"
-        mtable = Tabular(tabsize)
-        for i in range(nrow):
-            mtable.add_hline()
-            if i == 0:
-                mtable.add_row(
-                    tuple(
-                        [
-                            escape_latex(NoEscape(r"\textbf{" + item + r"}"))
-                            for item in data[i]
-                        ]
-                    )
-                )
-            else:
-                mtable.add_row(tuple([escape_latex(str(item)) for item in data[i]]))
-        mtable.add_hline()
 
-        if caption is not None:
-            table.add_caption(caption)
-        table.append(NoEscape(r"\centering"))
-        table.append(mtable)
+        # Rows are rendered to single fragments, identical to what
+        # Tabular.add_row/add_hline would produce cell by cell
+        header = "&".join(rf"\textbf{{{item}}}" for item in header) + r"\\"
+        body = [
+            "&".join(row) + r"\\"
+            for row in zip(*_formatColumns(keys, columns, formats))
+        ]
 
-        if label is not None:
-            table.append(Label(f"tab: {label}"))
+        # longtable is a row threshold (True for always, None or False for
+        # never) above which the table breaks across pages instead of being
+        # one float
+        threshold = longtable is not None and longtable is not False
+        if longtable is True or (threshold and len(body) > longtable):
+            self.content.append(_longTable(tabsize, header, body, caption, label))
+            if self.profile is not None:
+                self.profile.addBytes(sum(map(len, body)))
+            return
+
+        # chunk_size splits a large table into several floats, each
+        # repeating the header row
+        size = chunk_size or max(len(body), 1)
+        for start in range(0, max(len(body), 1), size):
+            end = start + size
+            table = Table(position="H")
+
+            mtable = Tabular(tabsize)
+            rows = [r"\hline", header]
+            for row in body[start:end]:
+                rows.append(r"\hline")
+                rows.append(row)
+            rows.append(r"\hline")
+            mtable.append(NoEscape("%\n".join(rows)))
+            if self.profile is not None:
+                self.profile.addBytes(sum(map(len, rows)))
 
-        self.content.append(table)
+            if caption is not None and start == 0:
+                table.add_caption(caption)
+            table.append(NoEscape(r"\centering"))
+            table.append(mtable)
 
+            if label is not None and start == 0:
+                table.append(Label(f"tab: {label}"))
+
+            self.content.append(table)
+
+    @synchronized
+    @profiled
     def addFigure(self, file=None, caption=None, label=None, width=None):
         fig = Figure(position="H")
+        self.assets.append(file)
         if width is not None:
             fig.add_image(file, width=width)
         else:
@@ -217,14 +668,27 @@ class PyTexReport:
             fig.append(Label(f"fig: {label}"))
         self.content.append(fig)
 
+    @synchronized
+    @profiled
     def addMatplot(
         self, plt, caption=None, label=None, dpi=300, extension="pdf", width=None
     ):
+        # The figure is pickled now and saved on the renderer's process pool;
+        # identical figures share one file
+        from pytexreport.figures import defaultRenderer
+
+        _configureMatplotlib()
+        renderer = self.figureRenderer or defaultRenderer()
+        path, future = renderer.submit(plt.gcf(), dpi=dpi, extension=extension)
+        if future is not None:
+            self.pendingFigures.append(future)
+        self.assets.append(path)
+
         fig = Figure(position="H")
         if width is not None:
-            fig.add_plot(width=NoEscape(width), dpi=dpi, extension=extension)
+            fig.add_image(path, width=NoEscape(width))
         else:
-            fig.add_plot(dpi=dpi, extension=extension)
+            fig.add_image(path)
         if caption is not None:
             fig.add_caption(caption)
         if label is not None:
@@ -232,72 +696,334 @@ class PyTexReport:
         self.content.append(fig)
         plt.clf()
 
+    @synchronized
+    @profiled
     def addEquation(
         self,
         equation,
         caption=None,
         label=None,
         inline=False,
+        latexify_options=None,
     ):
         if type(equation) is types.FunctionType:
-            equation = latexify.get_latex(equation)
+            cache = self.equationCache or defaultEquationCache()
+            equation = cache.get(equation, latexify_options)
 
+        if self.profile is not None:
+            self.profile.addBytes(len(equation))
         if not inline:
-            self.content.append(NoEscape(r"\begin{eqfloat}[H]"))
-            self.content.append(NoEscape(r"\begin{equation}"))
-            self.content.append(NoEscape(equation))
-            self.content.append(NoEscape(r"\end{equation}"))
+            latex = [r"\begin{eqfloat}[H]", r"\begin{equation}", equation]
+            latex.append(r"\end{equation}")
             if caption is not None:
-                self.content.append(NoEscape(r"\caption{" + caption + r"}"))
+                latex.append(r"\caption{" + caption + r"}")
             if label is not None:
-                self.content.append(NoEscape(r"\label{eq:" + label + r"}"))
+                latex.append(r"\label{eq:" + label + r"}")
 
-            self.content.append(NoEscape(r"\end{eqfloat}"))
+            latex.append(r"\end{eqfloat}")
+            self.content.append(fragment(*latex))
 
         else:
             self.content.append(NoEscape(rf"${equation}$"))
 
+    @synchronized
+    @profiled
     def addMatrix(self, matrix_equation, matrix_data, matrix_type="b"):
         # p = ( ), b = [ ], B = { }, v = | |, V = || ||
         matrix = Matrix(matrix_data, mtype=matrix_type)
-        self.content.append(NoEscape(r"\["))
-        self.content.append(NoEscape(rf"{matrix_equation} =" + rf"{matrix.dumps()}"))
-        self.content.append(NoEscape(r"\]"))
+        matrix = rf"{matrix_equation} =" + rf"{matrix.dumps()}"
+        if self.profile is not None:
+            self.profile.addBytes(len(matrix))
+        self.content.append(fragment(r"\[", matrix, r"\]"))
 
-    def output(self):
+    def outputName(self):
         filename = re.sub(r"[^\w\s]", "", self.title.lower())
         filename = " ".join(filename.split())
-        self.filename = filename.replace(" ", "_")
+        return filename.replace(" ", "_")
 
-        if hasattr(self, "classFile"):
-            inputpath = os.path.join(
-                self.doc._select_filepath(filepath=None), self.classFile
+    @synchronized
+    @profiled
+    def render(self, file=None):
+        """Return the LaTeX source of the report without compiling it.
+
+        With ``file``, a path or a writable text file object, the source is
+        written there instead. Pending sections are flushed first.
+        """
+        self.flush()
+        self.waitForFigures()
+        if file is None:
+            buffer = io.StringIO()
+            self._writeTex(buffer)
+            return buffer.getvalue()
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, "w", encoding="utf-8") as f:
+                self._writeTex(f)
+        else:
+            self._writeTex(file)
+
+    @synchronized
+    @profiled
+    def freeze(self):
+        """Render the report once into a `Template` to fill per variant.
+
+        Values are marked with `templates.placeholder` while building.
+        """
+        return Template(self.render())
+
+    def _writeTex(self, out):
+        if self.stream is not None:
+            self._writeStream(out)
+        else:
+            self.doc.dump(out)
+
+    @synchronized
+    @profiled
+    def output(self, cache_dir=None, format_dir=None, tex_only=False, queue_dir=None):
+        tex, classFiles = self._prepare(format_dir)
+        if tex_only:
+            # The source is meant to be compiled elsewhere, so it gets a copy
+            for path in classFiles:
+                shutil.copyfile(path, os.path.basename(path))
+            return tex
+
+        # Leave the compile to a pytexreport-worker and hand back a CompileJob
+        if queue_dir is not None:
+            with self._measure("enqueue"):
+                return enqueue(
+                    queue_dir,
+                    self.filename,
+                    [tex] + classFiles,
+                    self.assets,
+                    compiler=self.engine,
+                    draft=self.draftmode,
+                )
+
+        pdf = self.filename + ".pdf"
+        cache, key = self._lookup(cache_dir, [tex] + classFiles, pdf)
+        if cache is not None and key is None:
+            return pdf
+
+        fmt = self._format(format_dir, classFiles)
+        with self._measure("compile") as produced:
+            self.compileResult = compile_tex(
+                self.filename, fmt=fmt, **self._compileOptions(classFiles)
             )
-            outputpath = self.classFileName + ".cls"
-            shutil.copyfile(inputpath, outputpath)
+            produced.bytes = fileSize(pdf)
+
+        if cache is not None:
+            cache.put(key, pdf)
+        return pdf
+
+    async def output_async(self, cache_dir=None, format_dir=None, timeout=None):
+        """Like `output`, but compiles without blocking the event loop.
+
+        The report is locked while its source is written and its state is
+        updated, not while the engine runs. See `compiler.compile_tex_async`
+        for the concurrency limit, timeouts and cancellation.
+        """
+        start = time.perf_counter()
+        try:
+            return await self._outputAsync(cache_dir, format_dir, timeout)
+        finally:
+            self._record("output_async", start)
+
+    async def _outputAsync(self, cache_dir, format_dir, timeout):
+        # The blocking steps run on the default executor
+        loop = asyncio.get_running_loop()
+        filename, cache, key, fmt, options = await loop.run_in_executor(
+            None, self._prepareAsync, cache_dir, format_dir
+        )
+        pdf = filename + ".pdf"
+        if cache is not None and key is None:
+            return pdf
+
+        start = time.perf_counter()
+        result = await compile_tex_async(filename, fmt=fmt, timeout=timeout, **options)
+        with self._lock:
+            self.compileResult = result
+        self._record("compile", start, fileSize(pdf), phase=True)
+
+        if cache is not None:
+            await loop.run_in_executor(None, cache.put, key, pdf)
+        return pdf
+
+    @synchronized
+    def _prepareAsync(self, cache_dir, format_dir):
+        # Everything output_async() does before the engine runs, in one step
+        # under the report's lock
+        tex, classFiles = self._prepare(format_dir)
+        pdf = self.filename + ".pdf"
+        cache, key = self._lookup(cache_dir, [tex] + classFiles, pdf)
+        fmt = None
+        if cache is None or key is not None:
+            fmt = self._format(format_dir, classFiles)
+        return self.filename, cache, key, fmt, self._compileOptions(classFiles)
 
-        self.doc.generate_pdf(self.filename, clean_tex=False)
+    def _record(self, name, start, produced=0, phase=False):
+        # For timings that span awaits, so they are kept off the profile's
+        # stack of open calls that builder methods on other threads use
+        with self._lock:
+            if self.profile is not None:
+                self.profile.record(name, start, produced, phase)
 
-    def _flush(self):
-        if len(self.presentSection) > 2:
-            for item in self.content:
-                self.presentSection["subsubsection"].append(item)
-            self.presentSection["subsection"].append(
-                self.presentSection["subsubsection"]
+    @synchronized
+    @profiled
+    def preview(self):
+        """Recompile only the top-level sections changed since the last preview.
+
+        Every top-level section goes into its own file pulled in with
+        ``\\include``, so each one starts on a new page. Hashes of the
+        sections are kept in ``<name>.preview.json``; when only some sections
+        changed, ``\\includeonly`` compiles just those and the PDF shows only
+        them, with page numbers and references of the others taken from the
+        previous run. Auxiliary files are kept for the next preview.
+        """
+        if self.stream is not None:
+            raise ValueError("preview() needs the document in memory, not streamed")
+        self.flush()
+        self.waitForFigures()
+        self.filename = self.outputName()
+        pdf = self.filename + ".pdf"
+
+        main, sections = self._splitSections()
+        state = {
+            "main": _digestText(main),
+            "sections": {name: _digestText(latex) for name, latex in sections.items()},
+        }
+        changed = self._changedSections(state, pdf)
+        if changed is None:
+            return pdf
+
+        with self._measure("tex"):
+            for name in changed:
+                with open(name + ".tex", "w", encoding="utf-8") as f:
+                    f.write(sections[name])
+            if len(changed) < len(sections):
+                include = r"\includeonly{" + ",".join(changed) + "}%\n"
+                main = main.replace(
+                    r"\begin{document}", include + r"\begin{document}", 1
+                )
+            with open(self.filename + ".tex", "w", encoding="utf-8") as f:
+                f.write(main)
+
+        classFiles = [self.classFile] if hasattr(self, "classFile") else []
+        with self._measure("compile"):
+            self.compileResult = compile_tex(
+                self.filename, clean=False, **self._compileOptions(classFiles)
             )
-            self.presentSection["section"].append(self.presentSection["subsection"])
-            self.doc.append(self.presentSection["section"])
-        elif len(self.presentSection) > 1:
-            for item in self.content:
-                self.presentSection["subsection"].append(item)
-            self.presentSection["section"].append(self.presentSection["subsection"])
-            self.doc.append(self.presentSection["section"])
-        elif len(self.presentSection) > 0:
-            for item in self.content:
-                self.presentSection["section"].append(item)
-            self.doc.append(self.presentSection["section"])
-        else:
-            for item in self.content:
-                self.doc.append(item)
 
-        self.content = []
+        with open(self.filename + ".preview.json", "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        return pdf
+
+    def _splitSections(self):
+        # Renders each top-level section on its own and the document with an
+        # \include in its place; the document tree itself is left as is
+        self.doc._propagate_packages()
+        sections = {}
+        data = []
+        for item in self.doc.data:
+            # Subsections without a section above them stay in the main file
+            if type(item) is Section:
+                name = f"{self.filename}-{len(sections) + 1}"
+                sections[name] = item.dumps()
+                item = NoEscape(r"\include{" + name + "}")
+            data.append(item)
+
+        original, self.doc.data = self.doc.data, data
+        try:
+            return self.doc.dumps(), sections
+        finally:
+            self.doc.data = original
+
+    def _changedSections(self, state, pdf):
+        # Sections to compile, or None when the last preview is still current
+        try:
+            with open(self.filename + ".preview.json", encoding="utf-8") as f:
+                previous = json.load(f)
+        except (FileNotFoundError, ValueError):
+            previous = {}
+        if previous.get("main") != state["main"] or not os.path.isfile(pdf):
+            return list(state["sections"])
+
+        changed = [
+            name
+            for name, digest in state["sections"].items()
+            if previous["sections"].get(name) != digest
+            or not os.path.isfile(name + ".aux")
+        ]
+        return changed or None
+
+    @synchronized
+    def _prepare(self, format_dir=None):
+        # Writes the .tex, returns its path and the style's class file. The
+        # class file stays in the package and is found through TEXINPUTS.
+        self.filename = self.outputName()
+        tex = self.filename + ".tex"
+
+        classFiles = []
+        if hasattr(self, "classFile"):
+            classFiles.append(self.classFile)
+
+        # Marks where the part of the preamble that goes into the format ends
+        if format_dir is not None and ENDOFDUMP not in self.doc.preamble:
+            self.doc.preamble.insert(0, ENDOFDUMP)
+
+        with self._measure("figures"):
+            self.waitForFigures()
+
+        with self._measure("tex") as produced:
+            self.render(tex)
+            produced.bytes = fileSize(tex)
+        return tex, classFiles
+
+    def _lookup(self, cache_dir, files, pdf):
+        # Returns the cache and the key to store the PDF under; the key is
+        # None when the PDF was restored from the cache
+        if cache_dir is None:
+            return None, None
+
+        with self._measure("cache"):
+            cache = BuildCache(cache_dir)
+            key = cache.key(files + self.assets, [self.engine])
+            if not cache.get(key, pdf):
+                return cache, key
+
+        logger.debug("Build cache hit for {}", pdf)
+        self.compileResult = CompileResult()
+        return cache, None
+
+    def _format(self, format_dir, classFiles):
+        engine = get_engine(self.engine)
+        if format_dir is None or not engine.formats:
+            return None
+        with self._measure("format"):
+            return PreambleFormats(format_dir, engine.name).get(
+                self.filename, classFiles, self._environment(classFiles)
+            )
+
+    def _environment(self, classFiles):
+        return texinputs([os.path.dirname(path) for path in classFiles])
+
+    def _compileOptions(self, classFiles):
+        return {
+            "compiler": self.engine,
+            "draft": self.draftmode,
+            "env": self._environment(classFiles),
+        }
+
+    @synchronized
+    @profiled
+    def selectEngine(self, candidates=None):
+        """Compile the report with each installed engine and keep the fastest.
+
+        The choice is stored in ``engine``; other reports of the same style
+        can reuse it by assigning it to theirs.
+        """
+        if self.stream is not None:
+            raise ValueError("selectEngine() needs the document in memory")
+        tex, classFiles = self._prepare()
+        self.engine = select_engine(
+            self.filename, candidates, self._environment(classFiles), self.draftmode
+        )
+        return self.engine
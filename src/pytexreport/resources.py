@@ -0,0 +1,49 @@
+import atexit
+import functools
+import importlib
+import importlib.resources
+import os
+import pathlib
+import shutil
+import tempfile
+
+
+@functools.lru_cache(maxsize=None)
+def resource_path(package, resource):
+    """Return a filesystem path to ``resource`` shipped in ``package``.
+
+    Resources inside a zip or wheel are extracted once, under their own name
+    so TeX can find them, and removed at exit.
+    """
+    if hasattr(importlib.resources, "files"):
+        reference = importlib.resources.files(package) / resource
+        if isinstance(reference, pathlib.Path):
+            return os.fspath(reference)
+        data = reference.read_bytes()
+    else:
+        path = os.path.join(
+            os.path.dirname(importlib.import_module(package).__file__), resource
+        )
+        if os.path.isfile(path):
+            return path
+        data = importlib.resources.read_binary(package, resource)
+
+    directory = tempfile.mkdtemp(prefix="pytexreport-")
+    atexit.register(shutil.rmtree, directory, True)
+    path = os.path.join(directory, resource)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def texinputs(directories):
+    """Return an environment that lets TeX find files in ``directories``.
+
+    The directories are searched before the current ``TEXINPUTS``, or before
+    TeX's default path when it is unset. Returns None for no directories.
+    """
+    if not directories:
+        return None
+    env = os.environ.copy()
+    env["TEXINPUTS"] = os.pathsep.join(list(directories) + [env.get("TEXINPUTS", "")])
+    return env
@@ -1,9 +1,7 @@
-import os
-
 from pylatex import Command, Document, NoEscape
 from pylatex.base_classes import Arguments, Options
 
-from pytexreport import pytexreport
+from pytexreport import pytexreport, resources
 
 
 class basicHomework(pytexreport.PyTexReport):
@@ -23,9 +21,7 @@ class basicHomework(pytexreport.PyTexReport):
 
         doc = Document("documentclass", documentclass=docclass)
 
-        self.classFile = os.path.normpath(
-            rf"{os.path.dirname( __file__ )}\basicHomework.cls"
-        )
+        self.classFile = resources.resource_path(__package__, "basicHomework.cls")
         self.classFileName = "basicHomework"
 
         doc.packages.append(Command("usepackage", arguments=Arguments("lipsum")))
@@ -1,3 +1,4 @@
+import functools
 from datetime import date
 
 from pylatex import Command, Document, Figure, MiniPage, NoEscape
@@ -6,6 +7,72 @@ from pylatex.base_classes import Arguments, Options
 from pytexreport import pytexreport
 
 
+@functools.lru_cache(maxsize=None)
+def _preamble():
+    # Load Packages
+    packages = (
+        Command(
+            "usepackage",
+            arguments=Arguments("xcolor"),
+            options=Options("table", "xcdraw", "dvipsnames"),
+        ),
+        Command("usepackage", arguments=Arguments("hyperref")),
+        Command("usepackage", arguments=Arguments("amsfonts")),
+        Command("usepackage", arguments=Arguments("caption"), options=("labelfont=bf")),
+        Command("usepackage", arguments=Arguments("graphicx")),
+        Command("usepackage", arguments=Arguments("fancyhdr")),
+        Command("usepackage", arguments=Arguments("lastpage")),
+        Command(
+            "usepackage",
+            arguments=Arguments("biblatex"),
+            options=Options("style=apa"),
+        ),
+        Command("usepackage", arguments=Arguments("tocbibind")),
+        Command("usepackage", arguments=Arguments("csquotes")),
+        Command("usepackage", arguments=Arguments("comment")),
+        Command("usepackage", arguments=Arguments("array")),
+        Command(
+            "usepackage",
+            arguments=Arguments("adjustbox"),
+            options=Options("export"),
+        ),
+        Command(
+            "usepackage",
+            arguments=Arguments("appendix"),
+            options=Options("toc", "page"),
+        ),
+        Command(
+            "usepackage", arguments=Arguments("tocloft"), options=Options("titles")
+        ),
+        Command("usepackage", arguments=Arguments("subfig")),
+        Command("usepackage", arguments=Arguments("chngcntr")),
+        Command("usepackage", arguments=Arguments("amsmath")),
+        Command("usepackage", arguments=Arguments("tabularx")),
+        Command("usepackage", arguments=Arguments("multirow")),
+        Command("usepackage", arguments=Arguments("pdfpages")),
+        Command("usepackage", arguments=Arguments("rotating")),
+        Command("usepackage", arguments=Arguments("tikz")),
+        Command("usepackage", arguments=Arguments("longtable")),
+        Command("usepackage", arguments=Arguments("rotating")),
+        Command("numberwithin", arguments=Arguments("equation", "section")),
+        NoEscape(r"\usepackage{titlesec}"),
+    )
+
+    # Some Preamble
+    preamble = pytexreport.fragment(
+        r"\newcolumntype{P}[1]{>{\centering\arraybackslash}p{#1}}",
+        r"\titleformat{\section}",
+        r"{\normalfont\Large\bfseries}{\thesection}{1em}{}",
+        r"\setlength\parindent{0pt}",
+        r"\setitemize{noitemsep,topsep=0pt,parsep=0pt,partopsep=5pt}",
+        r"\addbibresource{sample.bib}",
+        # Counting figures and tables from section number
+        r"\counterwithin{figure}{section}",
+        r"\counterwithin{table}{section}",
+    )
+    return packages, preamble
+
+
 class basicReport(pytexreport.PyTexReport):
     def __init__(
         self,
@@ -35,90 +102,12 @@ class basicReport(pytexreport.PyTexReport):
         # Start LaTex Doc
         doc = Document(documentclass=docclass, geometry_options=geometry_options)
 
-        # Load Packages
-        doc.packages.append(
-            Command(
-                "usepackage",
-                arguments=Arguments("xcolor"),
-                options=Options("table", "xcdraw", "dvipsnames"),
-            )
-        )
-        doc.packages.append(Command("usepackage", arguments=Arguments("hyperref")))
-        doc.packages.append(Command("usepackage", arguments=Arguments("amsfonts")))
-        doc.packages.append(
-            Command(
-                "usepackage", arguments=Arguments("caption"), options=("labelfont=bf")
-            )
-        )
-        doc.packages.append(Command("usepackage", arguments=Arguments("graphicx")))
-        doc.packages.append(Command("usepackage", arguments=Arguments("fancyhdr")))
-        doc.packages.append(Command("usepackage", arguments=Arguments("lastpage")))
-        doc.packages.append(
-            Command(
-                "usepackage",
-                arguments=Arguments("biblatex"),
-                options=Options("style=apa"),
-            )
-        )
-        doc.packages.append(Command("usepackage", arguments=Arguments("tocbibind")))
-        doc.packages.append(Command("usepackage", arguments=Arguments("csquotes")))
-        doc.packages.append(Command("usepackage", arguments=Arguments("comment")))
-        doc.packages.append(Command("usepackage", arguments=Arguments("array")))
-        doc.packages.append(
-            Command(
-                "usepackage",
-                arguments=Arguments("adjustbox"),
-                options=Options("export"),
-            )
-        )
-        doc.packages.append(
-            Command(
-                "usepackage",
-                arguments=Arguments("appendix"),
-                options=Options("toc", "page"),
-            )
-        )
-        doc.packages.append(
-            Command(
-                "usepackage", arguments=Arguments("tocloft"), options=Options("titles")
-            )
-        )
-        doc.packages.append(Command("usepackage", arguments=Arguments("subfig")))
-        doc.packages.append(Command("usepackage", arguments=Arguments("chngcntr")))
-        doc.packages.append(Command("usepackage", arguments=Arguments("amsmath")))
-        doc.packages.append(Command("usepackage", arguments=Arguments("tabularx")))
-        doc.packages.append(Command("usepackage", arguments=Arguments("multirow")))
-        doc.packages.append(Command("usepackage", arguments=Arguments("pdfpages")))
-        doc.packages.append(Command("usepackage", arguments=Arguments("rotating")))
-        doc.packages.append(Command("usepackage", arguments=Arguments("tikz")))
-        doc.packages.append(Command("usepackage", arguments=Arguments("longtable")))
-        doc.packages.append(Command("usepackage", arguments=Arguments("rotating")))
-        doc.packages.append(
-            Command("numberwithin", arguments=Arguments("equation", "section"))
-        )
+        # Packages and preamble are built once and shared by every report
+        packages, preamble = _preamble()
+        doc.packages |= packages
+        doc.preamble.append(preamble)
 
-        # Some Preamble
         doc.append(NoEscape(r"\pagestyle{fancy}"))
-        doc.preamble.append(
-            NoEscape(r"\newcolumntype{P}[1]{>{\centering\arraybackslash}p{#1}}")
-        )
-
-        doc.packages.append(NoEscape(r"\usepackage{titlesec}"))
-        doc.preamble.append(NoEscape(r"\titleformat{\section}"))
-        doc.preamble.append(
-            NoEscape(r"{\normalfont\Large\bfseries}{\thesection}{1em}{}")
-        )
-
-        doc.preamble.append(NoEscape(r"\setlength\parindent{0pt}"))
-        doc.preamble.append(
-            NoEscape(r"\setitemize{noitemsep,topsep=0pt,parsep=0pt,partopsep=5pt}")
-        )
-
-        doc.preamble.append(NoEscape(r"\addbibresource{sample.bib}"))
-
-        # Counting figures and tables from section number
-        doc.preamble.append(NoEscape(r"\counterwithin{figure}{section}"))
-        doc.preamble.append(NoEscape(r"\counterwithin{table}{section}"))
 
         # Create Title Page
         doc.append(Command("begin", arguments=Arguments("titlepage")))
@@ -163,3 +152,4 @@ class basicReport(pytexreport.PyTexReport):
 
         self.doc = doc
         super().__init__()
+        self.assets.extend(["logo.png", "sample.bib"])
@@ -1,10 +1,27 @@
-import os
+import functools
 from typing import Union
 
 from pylatex import Command, Document, NoEscape
 from pylatex.base_classes import Arguments, Options
 
-from pytexreport import pytexreport
+from pytexreport import pytexreport, resources
+
+
+@functools.lru_cache(maxsize=None)
+def _preamble():
+    # Shared by every instance, see PyTexReport
+    packages = (
+        Command("usepackage", arguments=Arguments("cite")),
+        Command("usepackage", arguments=Arguments("amsmath,amssymb,amsfonts")),
+        Command("usepackage", arguments=Arguments("algorithmic")),
+        Command("usepackage", arguments=Arguments("graphicx")),
+        Command("usepackage", arguments=Arguments("textcomp")),
+    )
+    preamble = pytexreport.fragment(
+        r"\def\BibTeX{{\rm B\kern-.05em{\sc i\kern-.025em b}\kern-.08em",
+        r"    T\kern-.1667em\lower.7ex\hbox{E}\kern-.125emX}}",
+    )
+    return packages, preamble
 
 
 class ieeeConference(pytexreport.PyTexReport):
@@ -27,27 +44,15 @@ class ieeeConference(pytexreport.PyTexReport):
             arguments=[NoEscape(r"IEEEtran")],
         )
 
-        self.classFile = os.path.normpath(
-            rf"{os.path.dirname( __file__ )}\ieeeConference.cls"
-        )
+        self.classFile = resources.resource_path(__package__, "ieeeConference.cls")
         self.classFileName = "ieeeConference"
 
         # Preamble things
         if title_note is not None:
             doc.preamble.append(NoEscape(r"\IEEEoverridecommandlockouts"))
-        doc.packages.append(Command("usepackage", arguments=Arguments("cite")))
-        doc.packages.append(
-            Command("usepackage", arguments=Arguments("amsmath,amssymb,amsfonts"))
-        )
-        doc.packages.append(Command("usepackage", arguments=Arguments("algorithmic")))
-        doc.packages.append(Command("usepackage", arguments=Arguments("graphicx")))
-        doc.packages.append(Command("usepackage", arguments=Arguments("textcomp")))
-        doc.preamble.append(
-            NoEscape(r"\def\BibTeX{{\rm B\kern-.05em{\sc i\kern-.025em b}\kern-.08em")
-        )
-        doc.preamble.append(
-            NoEscape(r"    T\kern-.1667em\lower.7ex\hbox{E}\kern-.125emX}}")
-        )
+        packages, preamble = _preamble()
+        doc.packages |= packages
+        doc.preamble.append(preamble)
 
         # Make Title Page
         doc.append(NoEscape(r"\title{" + self.title))
@@ -94,12 +99,18 @@ class ieeeConference(pytexreport.PyTexReport):
         self.doc = doc
         super().__init__()
 
+    @pytexreport.synchronized
+    @pytexreport.profiled
     def createAbstract(self, abstract: str):
-        self.doc.append(NoEscape(r"\begin{abstract}"))
-        self.doc.append(NoEscape(abstract))
-        self.doc.append(NoEscape(r"\end{abstract}"))
+        self.doc.append(
+            pytexreport.fragment(r"\begin{abstract}", abstract, r"\end{abstract}")
+        )
 
+    @pytexreport.synchronized
+    @pytexreport.profiled
     def createKeywords(self, keywords: list):
-        self.doc.append(NoEscape(r"\begin{IEEEkeywords}"))
-        self.doc.append(NoEscape(", ".join(keywords)))
-        self.doc.append(NoEscape(r"\end{IEEEkeywords}"))
+        self.doc.append(
+            pytexreport.fragment(
+                r"\begin{IEEEkeywords}", ", ".join(keywords), r"\end{IEEEkeywords}"
+            )
+        )
@@ -0,0 +1,78 @@
+import os
+import re
+
+from pylatex import NoEscape
+from pylatex.base_classes import LatexObject
+from pylatex.utils import escape_latex
+
+# Control characters and hex digits pass through LaTeX escaping unchanged, so
+# a marker survives addText, addTable cells and captions alike. The closing
+# character records whether the value is escaped when the template is filled.
+_FIELD = re.compile("\x02([0-9a-f]*)([\x03\x04])")
+_ESCAPED = "\x03"
+_RAW = "\x04"
+
+
+def placeholder(name, escape=True):
+    """Return a marker that `Template.fill` replaces with the value of ``name``.
+
+    The value is escaped, like the text of a table cell or a caption. Use
+    ``escape=False`` where the builder takes LaTeX, as ``addText`` does, so
+    the value goes in unchanged like in a report built with it directly.
+    Section titles cannot hold placeholders, as their labels derive from them.
+    """
+    end = _ESCAPED if escape else _RAW
+    return NoEscape("\x02" + name.encode().hex() + end)
+
+
+def hasPlaceholder(text):
+    return _FIELD.search(str(text)) is not None
+
+
+def _latex(value, escape):
+    if isinstance(value, LatexObject):
+        return value.dumps()
+    if escape:
+        return escape_latex(value)
+    return str(value)
+
+
+class Template:
+    """LaTeX source of a frozen report, split at its placeholders.
+
+    Created by ``PyTexReport.freeze()``. Each `fill` only joins the
+    pre-rendered fragments with the values, so variants of one report cost a
+    string concatenation instead of rebuilding the document.
+    """
+
+    def __init__(self, latex):
+        parts = _FIELD.split(latex)
+        self.fragments = parts[0::3]
+        self.fields = [bytes.fromhex(part).decode() for part in parts[1::3]]
+        self.escapes = [end == _ESCAPED for end in parts[2::3]]
+
+    def fill(self, values, file=None):
+        """Return the source with every placeholder replaced from ``values``.
+
+        Strings are escaped unless they are `NoEscape` or the placeholder was
+        made with ``escape=False``; pylatex objects, such as a `Tabular`, are
+        dumped. With ``file``, a path or a writable text file object, the
+        source is written there instead.
+        """
+        fields = list(zip(self.fields, self.escapes))
+        latex = {
+            (name, escape): _latex(values[name], escape) for name, escape in set(fields)
+        }
+        pieces = [self.fragments[0]]
+        for field, fragment in zip(fields, self.fragments[1:]):
+            pieces.append(latex[field])
+            pieces.append(fragment)
+        source = "".join(pieces)
+
+        if file is None:
+            return source
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, "w", encoding="utf-8") as f:
+                f.write(source)
+        else:
+            file.write(source)
@@ -0,0 +1,267 @@
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+
+from loguru import logger
+from pylatex.errors import CompilerError
+
+from pytexreport.assets import AssetStore
+from pytexreport.batch import _stage
+from pytexreport.compiler import CompileResult, compile_tex
+
+# A bundle is written to incoming/, published to pending/, claimed by a worker
+# into running/ and finally moved to done/ or failed/. Every move is a rename
+# within the queue directory, so each step is atomic. A claimed bundle is
+# named <job>@<host>@<pid> after the worker process that compiles it.
+STATES = ("incoming", "pending", "running", "done", "failed")
+
+# Silent in applications unless they opt in with
+# logger.enable("pytexreport.worker"); the command line worker enables it
+logger.disable(__name__)
+
+
+_stores = {}
+
+
+def _store(queue_dir):
+    # Assets are stored inside the queue so bundles can hard-link them
+    store = _stores.get(queue_dir)
+    if store is None:
+        store = _stores[queue_dir] = AssetStore(os.path.join(queue_dir, "assets"))
+    return store
+
+
+def _directories(queue_dir):
+    paths = {state: os.path.join(queue_dir, state) for state in STATES}
+    for path in paths.values():
+        os.makedirs(path, exist_ok=True)
+    return paths
+
+
+class CompileJob:
+    """Handle on a build bundle queued by ``output(queue_dir=...)``.
+
+    `result` waits for a worker to compile the bundle and copies the PDF to
+    ``target``. The handle can also be awaited.
+    """
+
+    def __init__(self, queue_dir, job, name, target=None):
+        self.queueDir = queue_dir
+        self.job = job
+        self.name = name
+        self.target = os.path.abspath(target or name + ".pdf")
+        self.compileResult = None
+
+    def _path(self, state, *parts):
+        return os.path.join(self.queueDir, state, self.job, *parts)
+
+    def done(self):
+        return (
+            self.compileResult is not None
+            or os.path.isdir(self._path("done"))
+            or os.path.isdir(self._path("failed"))
+        )
+
+    def result(self, timeout=None, poll=0.1):
+        """Wait for the compiled PDF and return its path.
+
+        Raises `TimeoutError` after ``timeout`` seconds, and `CompilerError`
+        when the compile failed. Without ``timeout`` this waits until a
+        worker has compiled the bundle, see `run` for crashed workers.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.done():
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Job {self.job} is not done after {timeout}s")
+            time.sleep(poll)
+        return self._collect()
+
+    def __await__(self):
+        return self._wait().__await__()
+
+    async def _wait(self, poll=0.1):
+        while not self.done():
+            await asyncio.sleep(poll)
+        return self._collect()
+
+    def _collect(self):
+        if self.compileResult is not None:
+            return self.target
+
+        # Failed bundles stay in the queue for inspection
+        if os.path.isdir(self._path("failed")):
+            with open(self._path("failed", "error.txt"), encoding="utf-8") as f:
+                raise CompilerError(f"Compiling {self.name} failed\n{f.read()}")
+
+        with open(self._path("done", "result.json"), encoding="utf-8") as f:
+            self.compileResult = CompileResult(**json.load(f))
+        shutil.copyfile(self._path("done", self.name + ".pdf"), self.target)
+        shutil.rmtree(self._path("done"), ignore_errors=True)
+        return self.target
+
+
+def enqueue(queue_dir, name, files, assets=(), source=None, compiler=None, draft=False):
+    """Copy a self-contained build bundle into ``queue_dir``.
+
+    ``files`` are copied flat next to ``name + ".tex"``; relative ``assets``
+    are linked from the queue's `AssetStore` and keep their path below
+    ``source``. Absolute paths, such as rendered figures, are used in place,
+    so workers must share the filesystem. ``compiler`` and ``draft`` are
+    passed on to `compile_tex`.
+    """
+    queue_dir = os.path.abspath(queue_dir)
+    paths = _directories(queue_dir)
+
+    # Job names sort in submission order
+    job = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+    bundle = os.path.join(paths["incoming"], job)
+    os.makedirs(bundle)
+    for path in files:
+        shutil.copyfile(path, os.path.join(bundle, os.path.basename(path)))
+    _stage(assets, source or os.getcwd(), bundle, _store(queue_dir))
+    with open(os.path.join(bundle, "job.json"), "w", encoding="utf-8") as f:
+        json.dump({"name": name, "compiler": compiler, "draft": draft}, f)
+
+    os.rename(bundle, os.path.join(paths["pending"], job))
+    return CompileJob(queue_dir, job, name)
+
+
+def _claim(paths):
+    owner = f"{socket.gethostname()}@{os.getpid()}"
+    for job in sorted(os.listdir(paths["pending"])):
+        claimed = f"{job}@{owner}"
+        try:
+            os.rename(
+                os.path.join(paths["pending"], job),
+                os.path.join(paths["running"], claimed),
+            )
+        except OSError:
+            # Another worker claimed it first
+            continue
+        return claimed
+    return None
+
+
+def _alive(pid):
+    # Signal 0 only checks that the process exists on POSIX; elsewhere every
+    # worker is assumed to be running
+    if os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _requeue(paths):
+    # Bundles claimed by a worker process of this host that no longer runs go
+    # back to pending/, so their CompileJob is not left waiting forever
+    host = socket.gethostname()
+    requeued = 0
+    for claimed in os.listdir(paths["running"]):
+        try:
+            job, owner, pid = claimed.split("@")
+            if owner != host or _alive(int(pid)):
+                continue
+            os.rename(
+                os.path.join(paths["running"], claimed),
+                os.path.join(paths["pending"], job),
+            )
+        except (ValueError, OSError):
+            continue
+        logger.warning("Requeued job {} of stopped worker {}", job, pid)
+        requeued += 1
+    return requeued
+
+
+def _compile(queue_dir, claimed):
+    running = os.path.join(queue_dir, "running", claimed)
+    job = claimed.split("@")[0]
+    try:
+        with open(os.path.join(running, "job.json"), encoding="utf-8") as f:
+            options = json.load(f)
+        result = compile_tex(
+            os.path.join(running, options["name"]),
+            compiler=options.get("compiler"),
+            draft=options.get("draft", False),
+        )
+        with open(os.path.join(running, "result.json"), "w", encoding="utf-8") as f:
+            json.dump(asdict(result), f)
+        state = "done"
+    except Exception:
+        logger.warning("Compiling job {} failed", job)
+        with open(os.path.join(running, "error.txt"), "w", encoding="utf-8") as f:
+            f.write(traceback.format_exc())
+        state = "failed"
+    os.rename(running, os.path.join(queue_dir, state, job))
+
+
+def run(queue_dir, workers=None, once=False, poll=0.5):
+    """Compile queued bundles, at most ``workers`` at a time.
+
+    With ``once`` the worker returns as soon as the queue is empty. Whenever
+    the queue runs empty, bundles left in ``running/`` by a worker process of
+    the same host that has stopped are queued again. Those of a worker on
+    another host, or on a system without POSIX signals, have to be moved
+    back to ``pending/`` by hand.
+    """
+    queue_dir = os.path.abspath(queue_dir)
+    paths = _directories(queue_dir)
+    workers = workers or os.cpu_count() or 1
+    slots = threading.BoundedSemaphore(workers)
+
+    logger.debug("Compiling bundles from {} with {} worker(s)", queue_dir, workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            slots.acquire()
+            job = _claim(paths)
+            if job is None and _requeue(paths):
+                job = _claim(paths)
+            if job is None:
+                slots.release()
+                if once:
+                    break
+                time.sleep(poll)
+                continue
+            future = pool.submit(_compile, queue_dir, job)
+            future.add_done_callback(lambda _: slots.release())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="pytexreport-worker",
+        description="Compile report bundles queued by output(queue_dir=...).",
+    )
+    parser.add_argument("queue_dir")
+    parser.add_argument(
+        "-j", "--workers", type=int, help="concurrent compiles (default: CPU count)"
+    )
+    parser.add_argument(
+        "--once", action="store_true", help="exit once the queue is empty"
+    )
+    parser.add_argument(
+        "--poll", type=float, default=0.5, help="seconds between queue scans"
+    )
+    args = parser.parse_args(argv)
+    logger.enable("pytexreport")
+
+    try:
+        run(args.queue_dir, args.workers, args.once, args.poll)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Synthetic documents of increasing size for the benchmarks."""
+
+import numpy as np
+
+from pytexreport.style.basicReport import basicReport
+
+
+def report():
+    return basicReport(
+        title="Benchmark Report",
+        subtitle="Synthetic document",
+        department="Performance",
+        organization="PyTexReport",
+        authors=["Benchmark"],
+    )
+
+
+def paragraphs(count, document=None):
+    document = document or report()
+    document.createSection("Paragraphs")
+    for i in range(count):
+        document.addText(f"Paragraph {i} with some text & symbols_{i}.")
+    return document
+
+
+def sections(count, document=None):
+    # Three levels deep, three subsections and nine subsubsections a section
+    document = document or report()
+    for i in range(count):
+        document.createSection(f"Section {i}")
+        document.addText("Section text.")
+        for j in range(3):
+            document.createSubSection(f"Subsection {i}.{j}")
+            for k in range(3):
+                document.createSubSubSection(f"Subsubsection {i}.{j}.{k}")
+                document.addText("Subsubsection text.")
+    return document
+
+
+def equations(count, document=None):
+    document = document or report()
+    document.createSection("Equations")
+    matrix = np.arange(9).reshape(3, 3)
+    for i in range(count):
+        document.addEquation(rf"x_{{{i}}} = \frac{{a + b}}{{c}}", label=f"eq{i}")
+        document.addMatrix(f"M_{{{i}}}", matrix)
+    return document
+
+
+def table(rows, columns=10):
+    document = report()
+    document.createSection("Table")
+    data = np.arange(rows * columns, dtype=float).reshape(rows, columns) / 7
+    document.addTable(
+        data=data,
+        header=[f"Column {i}" for i in range(columns)],
+        formats=".3f",
+        longtable=True,
+    )
+    return document
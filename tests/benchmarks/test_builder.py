@@ -0,0 +1,99 @@
+import shutil
+
+import pytest
+
+from pytexreport.style.basicHomework import basicHomework
+from tests.benchmarks import documents
+
+
+def rendered(build, *args):
+    # Builds a fresh document outside the measured call and times render()
+    return {
+        "target": lambda report: report.render(),
+        "setup": lambda: ((build(*args),), {}),
+        "rounds": 5,
+    }
+
+
+@pytest.mark.parametrize("count", [10, 1_000, 100_000])
+def test_build_paragraphs(benchmark, count):
+    benchmark.group = "build paragraphs"
+    report = benchmark(documents.paragraphs, count)
+    assert sum("Paragraph " in item for item in report.content) == count
+
+
+@pytest.mark.parametrize("count", [10, 1_000, 100_000])
+def test_render_paragraphs(benchmark, count):
+    benchmark.group = "render paragraphs"
+    latex = benchmark.pedantic(**rendered(documents.paragraphs, count))
+    assert latex.count("Paragraph ") == count
+
+
+@pytest.mark.parametrize("profiled", [False, True])
+def test_add_text(benchmark, profiled):
+    # Cost of a cheap builder call, and what profiling adds to it
+    benchmark.group = "addText"
+    report = documents.report()
+    if profiled:
+        report.enableProfiling()
+    benchmark(report.addText, "Paragraph with some text & symbols_.")
+
+
+@pytest.mark.parametrize("rows", [1_000, 10_000])
+def test_build_table(benchmark, rows):
+    benchmark.group = "build table of 10 columns"
+    benchmark(documents.table, rows)
+
+
+@pytest.mark.parametrize("rows", [1_000, 10_000])
+def test_render_table(benchmark, rows):
+    benchmark.group = "render table of 10 columns"
+    latex = benchmark.pedantic(**rendered(documents.table, rows))
+    assert r"\begin{longtable}" in latex
+
+
+@pytest.mark.parametrize("count", [100, 1_000, 10_000])
+def test_build_equations(benchmark, count):
+    benchmark.group = "build equations and matrices"
+    benchmark(documents.equations, count)
+
+
+@pytest.mark.parametrize("count", [100, 1_000, 10_000])
+def test_render_equations(benchmark, count):
+    benchmark.group = "render equations and matrices"
+    latex = benchmark.pedantic(**rendered(documents.equations, count))
+    assert latex.count(r"\begin{bmatrix}") == count
+
+
+@pytest.mark.parametrize("count", [10, 100, 1_000])
+def test_build_sections(benchmark, count):
+    benchmark.group = "build nested sections"
+    benchmark(documents.sections, count)
+
+
+@pytest.mark.parametrize("count", [10, 100, 1_000])
+def test_render_sections(benchmark, count):
+    benchmark.group = "render nested sections"
+    latex = benchmark.pedantic(**rendered(documents.sections, count))
+    assert latex.count(r"\subsubsection{") == count * 9
+
+
+@pytest.mark.skipif(shutil.which("pdflatex") is None, reason="needs pdflatex")
+@pytest.mark.parametrize("count", [10, 1_000])
+def test_compile_paragraphs(benchmark, count, tmp_path, monkeypatch):
+    benchmark.group = "compile paragraphs"
+    monkeypatch.chdir(tmp_path)
+
+    def homework():
+        return basicHomework(
+            title="Benchmark Homework",
+            subtitle="Synthetic document",
+            author="Benchmark",
+            author_id="0",
+        )
+
+    benchmark.pedantic(
+        lambda report: report.output(),
+        setup=lambda: ((documents.paragraphs(count, homework()),), {}),
+        rounds=3,
+    )
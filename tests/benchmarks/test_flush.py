@@ -0,0 +1,20 @@
+import pytest
+
+from pytexreport.style.basicHomework import basicHomework
+
+
+@pytest.mark.parametrize("size", [100, 10_000, 100_000])
+def test_flush_cost_is_independent_of_document_size(benchmark, size):
+    benchmark.group = "flush on a section change"
+    benchmark.extra_info["paragraphs"] = size
+    report = basicHomework(title="Flush", subtitle="", author="A", author_id="1")
+    report.createSection("Existing")
+    for i in range(size):
+        report.addText(f"Paragraph {i}")
+    report.flush()
+
+    def sectionChange():
+        report.addText("Pending text")
+        report.createSection("Next")
+
+    benchmark(sectionChange)
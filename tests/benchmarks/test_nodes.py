@@ -0,0 +1,24 @@
+import pytest
+
+from tests.test_nodes import (
+    CALLS,
+    fragmentContent,
+    objectContent,
+    reportContent,
+    retained,
+)
+
+# Separate pylatex objects, pre-joined fragments, and fragments added through
+# the builder methods
+PATHS = {
+    "objects": objectContent,
+    "fragments": fragmentContent,
+    "builder": reportContent,
+}
+
+
+@pytest.mark.parametrize("path", list(PATHS))
+def test_builder_calls(benchmark, path):
+    benchmark.group = f"{CALLS} addText/addEquation/addMatrix calls"
+    benchmark.extra_info["retained bytes"] = retained(PATHS[path], CALLS)
+    benchmark.pedantic(PATHS[path], args=(CALLS,), rounds=3)
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from pytexreport.style.basicHomework import basicHomework
+from tests.test_tables import perCellTable
+
+ROWS = 10_000
+COLUMNS = 10
+
+
+@pytest.fixture(scope="module")
+def data():
+    return np.arange(ROWS * COLUMNS).reshape(ROWS, COLUMNS) / 7
+
+
+@pytest.fixture(scope="module")
+def rows(data):
+    return [[f"Column {i}" for i in range(COLUMNS)]] + data.tolist()
+
+
+def addTable(**kwargs):
+    report = basicHomework(title="Table", subtitle="", author="A", author_id="1")
+    report.addTable(**kwargs)
+    return report.content[-1].dumps()
+
+
+def test_per_cell_loop(benchmark, rows):
+    benchmark.group = "table of 100k cells"
+    benchmark(lambda: perCellTable(rows).dumps())
+
+
+def test_row_list(benchmark, rows):
+    benchmark.group = "table of 100k cells"
+    latex = benchmark(addTable, data=rows)
+    assert latex == perCellTable(rows).dumps()
+
+
+def test_array(benchmark, data):
+    benchmark.group = "table of 100k cells"
+    header = [f"Column {i}" for i in range(COLUMNS)]
+    benchmark(addTable, data=data, header=header)
+
+
+def test_array_with_formats(benchmark, data):
+    benchmark.group = "table of 100k cells"
+    benchmark(addTable, data=data, formats=".3f")
@@ -0,0 +1,14 @@
+from tests.test_templates import build, template
+
+VALUES = {"name": "Jane Doe", "amount": "100", "note": "Paid in full"}
+
+
+def test_fill_variant(benchmark):
+    benchmark.group = "report variants"
+    frozen = template()
+    benchmark(frozen.fill, VALUES)
+
+
+def test_build_variant(benchmark):
+    benchmark.group = "report variants"
+    benchmark(lambda: build(VALUES).render())
@@ -0,0 +1,66 @@
+import os
+import stat
+import sys
+
+import pytest
+
+# Writes the .aux files and, unless in draft mode, the .pdf a real engine
+# would: the main .aux reads the .aux of every \include'd file, and only the
+# files selected by \includeonly get their .aux written
+FAKE_ENGINE = r"""#!{python}
+import os
+import re
+import sys
+
+tex = sys.argv[-1]
+base = os.path.splitext(tex)[0]
+with open(tex) as f:
+    source = f.read()
+included = re.findall(r"\\include\{{(.+?)\}}", source)
+only = re.search(r"\\includeonly\{{(.*?)\}}", source)
+selected = only.group(1).split(",") if only else included
+
+with open(base + ".aux", "w") as f:
+    f.write("\\relax\n")
+    for name in included:
+        f.write("\\@input{{" + name + ".aux}}\n")
+for name in selected:
+    with open(os.path.join(os.path.dirname(base), name + ".aux"), "w") as f:
+        f.write("\\relax\n")
+if "-draftmode" not in sys.argv:
+    with open(base + ".pdf", "wb") as f:
+        f.write(b"%PDF-1.5\n")
+with open(os.path.join(os.path.dirname(__file__), "calls"), "a") as f:
+    f.write(" ".join(sys.argv[1:]) + "\n")
+"""
+
+
+def install(directory, name, source=FAKE_ENGINE, prelude=""):
+    """Write an executable ``name`` that runs ``source`` with this Python.
+
+    ``{python}`` in ``source`` stands for the interpreter; ``prelude`` is
+    code run before the rest of ``source``.
+    """
+    first, rest = source.format(python=sys.executable).split("\n", 1)
+    engine = directory / name
+    engine.write_text(first + "\n" + prelude + rest)
+    engine.chmod(engine.stat().st_mode | stat.S_IEXEC)
+    return engine
+
+
+@pytest.fixture
+def bindir(tmp_path_factory, monkeypatch):
+    """A directory searched first on the PATH, to `install` engines into."""
+    directory = tmp_path_factory.mktemp("bin")
+    monkeypatch.setenv("PATH", f"{directory}{os.pathsep}{os.environ['PATH']}")
+    return directory
+
+
+@pytest.fixture
+def fake_tex(bindir):
+    """Put a stand-in for pdflatex first on the PATH.
+
+    Returns the directory holding it; ``calls`` there lists every run.
+    """
+    install(bindir, "pdflatex")
+    return bindir
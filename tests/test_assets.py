@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+from pytexreport.assets import AssetStore
+from pytexreport.batch import _render, render_many
+from pytexreport.style.basicHomework import basicHomework
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AssetStore(str(tmp_path / "store"))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_identical_files_are_stored_once(store, tmp_path):
+    (tmp_path / "a.png").write_bytes(b"image")
+    (tmp_path / "b.png").write_bytes(b"image")
+
+    stored = {store.put(str(tmp_path / name)) for name in ("a.png", "b.png")}
+
+    assert len(stored) == 1
+    assert os.listdir(store.directory) == [os.path.basename(stored.pop())]
+
+
+def test_modified_file_is_hashed_again(store, tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("1")
+    first = store.digest(str(path))
+    os.utime(path, ns=(0, 0))
+    path.write_text("2")
+
+    assert store.digest(str(path)) != first
+    assert len(store.digests) == 2
+
+
+def test_link_falls_back_to_symlinks_and_copies(store, tmp_path, monkeypatch):
+    (tmp_path / "logo.png").write_bytes(b"logo")
+    source = str(tmp_path / "logo.png")
+
+    store.link(source, str(tmp_path / "build" / "hard.png"))
+    stored = os.stat(store.put(source))
+    assert os.stat(tmp_path / "build" / "hard.png").st_ino == stored.st_ino
+
+    def refuse(*args):
+        raise OSError("not supported")
+
+    monkeypatch.setattr(os, "link", refuse)
+    store.link(source, str(tmp_path / "build" / "soft.png"))
+    assert os.path.islink(tmp_path / "build" / "soft.png")
+
+    monkeypatch.setattr(os, "symlink", refuse)
+    store.link(source, str(tmp_path / "build" / "copy.png"))
+    assert (tmp_path / "build" / "copy.png").read_bytes() == b"logo"
+    assert not os.path.islink(tmp_path / "build" / "copy.png")
+
+
+def test_render_links_relative_assets_into_the_build(fake_tex, workdir, store):
+    (workdir / "figures").mkdir()
+    (workdir / "figures" / "plot.png").write_bytes(b"plot")
+    report = basicHomework(title="Assets", subtitle="", author="A", author_id="1")
+    report.addFigure("figures/plot.png")
+    # Absolute, missing and outside paths are left to TeX
+    report.assets += [str(workdir / "figures" / "plot.png"), "missing.png", "../x"]
+
+    result = _render(0, report, "assets", str(workdir), str(workdir), None, store)
+
+    assert result.ok, result.error
+    assert (workdir / "assets.pdf").is_file()
+    assert len(os.listdir(store.directory)) == 1
+    assert os.getcwd() == str(workdir)
+
+
+def test_render_reports_failures(workdir, store, monkeypatch):
+    monkeypatch.setenv("PATH", "")
+    report = basicHomework(title="Broken", subtitle="", author="A", author_id="1")
+
+    result = _render(3, report, "broken", str(workdir), str(workdir), None, store)
+
+    assert (result.index, result.title, result.pdf) == (3, "Broken", None)
+    assert "No LaTex compiler was found" in result.error
+    assert os.getcwd() == str(workdir)
+
+
+def test_reports_with_the_same_title_get_their_own_pdf(fake_tex, workdir):
+    reports = [
+        basicHomework(title="Same", subtitle="", author="A", author_id="1")
+        for _ in range(2)
+    ]
+
+    results = render_many(reports, asset_dir=str(workdir / "store"))
+
+    assert [result.pdf for result in results] == [
+        str(workdir / "same-0.pdf"),
+        str(workdir / "same-1.pdf"),
+    ]
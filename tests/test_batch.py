@@ -0,0 +1,60 @@
+import os
+
+from pytexreport.batch import render_many
+from pytexreport.style.basicHomework import basicHomework
+
+
+def homework(title):
+    report = basicHomework(title=title, subtitle="Batch", author="A", author_id="1")
+    report.createSection("Answer")
+    report.addText("Text goes here.")
+    return report
+
+
+def test_render_many(fake_tex, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    results = render_many([homework("First"), homework("Second")], workers=2)
+
+    assert [result.ok for result in results] == [True, True]
+    assert [result.title for result in results] == ["First", "Second"]
+    assert (tmp_path / "first.pdf").is_file()
+    assert (tmp_path / "second.pdf").is_file()
+
+
+def test_render_many_relative_cache_dir(fake_tex, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    first = render_many([homework("Cached")], cache_dir="cache")
+    second = render_many([homework("Cached")], cache_dir="cache")
+
+    assert first[0].ok and first[0].passes > 0
+    assert (tmp_path / "cache").is_dir()
+    assert second[0].ok and second[0].passes == 0
+
+
+def test_render_many_stores_assets_once(fake_tex, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "plot.png").write_bytes(b"plot")
+    reports = [homework("First"), homework("Second")]
+    for report in reports:
+        report.addFigure("plot.png")
+
+    results = render_many(reports, asset_dir=str(tmp_path / "store"))
+
+    assert [result.ok for result in results] == [True, True]
+    assert len(os.listdir(tmp_path / "store")) == 1
+
+
+def test_render_many_reports_a_report_that_cannot_be_sent(
+    fake_tex, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    unpicklable = homework("Unpicklable")
+    unpicklable.callback = lambda: None
+
+    results = render_many([unpicklable, homework("Fine")])
+
+    assert [result.ok for result in results] == [False, True]
+    assert results[0].title == "Unpicklable"
+    assert "pickle" in results[0].error
@@ -0,0 +1,153 @@
+import io
+import pickle
+
+import pytest
+
+from pytexreport.style.basicHomework import basicHomework
+from pytexreport.style.basicReport import basicReport
+from pytexreport.style.ieeeConference import ieeeConference
+
+AUTHOR = {
+    "fullname": "Ada Lovelace",
+    "department": "Mathematics",
+    "affiliation": "Analytical Engines",
+    "city": "London",
+    "country": "UK",
+    "contact": "ada@example.org",
+}
+
+
+@pytest.fixture
+def report():
+    return basicHomework(title="Builder", subtitle="", author="A", author_id="1")
+
+
+def test_conference_paper_renders_title_abstract_and_keywords():
+    paper = ieeeConference(
+        title="Engines",
+        authors={"first": AUTHOR, "second": dict(AUTHOR, fullname="Charles")},
+        thanks="Funded",
+        title_note="Draft",
+    )
+    paper.createAbstract("We compute.")
+    paper.createKeywords(["engines", "notes"])
+    paper.createSection("Introduction")
+    paper.addText("Text")
+
+    latex = paper.render()
+
+    assert r"\documentclass[conference]{IEEEtran}" in latex
+    assert r"\IEEEoverridecommandlockouts" in latex
+    assert r"\thanks{Funded}" in latex
+    assert latex.count(r"\IEEEauthorblockN{") == 2
+    assert "\\begin{abstract}%\nWe compute.%\n\\end{abstract}" in latex
+    assert "engines, notes" in latex
+    assert paper.classFile.endswith("ieeeConference.cls")
+
+
+@pytest.mark.parametrize(
+    "authors, footer", [(["Ada"], "Ada"), (["Ada", "Charles"], "Mathematics")]
+)
+def test_report_footer_names_the_author_or_department(authors, footer):
+    report = basicReport(
+        title="Notes",
+        subtitle="",
+        department="Mathematics",
+        organization="Analytical Engines",
+        authors=authors,
+    )
+
+    assert r"\fancyfoot[L]{" + footer + "}" in report.render()
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("#!Warning", r"\textcolor{Bittersweet}{!Warning}"),
+        ("#*Done", r"\textcolor{LimeGreen}{*Done}"),
+        ("#?Question", r"\textcolor{Cyan}{?Question}"),
+        ("#TODO later", r"\textcolor{YellowOrange}{TODO later}"),
+    ],
+)
+def test_text_markers_color_the_text(report, text, expected):
+    report.addText(text, new_paragraph=False)
+
+    assert report.content[-1] == expected
+
+
+def test_text_color(report):
+    report.addText("Blue", color="blue")
+
+    assert report.content[-1] == "\\textcolor{blue}{Blue}%\n"
+
+
+@pytest.mark.parametrize(
+    "kind, environment", [(1, "itemize"), (2, "enumerate"), (3, "description")]
+)
+def test_lists(report, kind, environment):
+    items = [("a", "b"), ("c", "d")] if kind == 3 else ["a", "b"]
+
+    report.addList(items, type=kind)
+
+    latex = report.content[-1].dumps()
+    assert latex.startswith(r"\begin{" + environment + "}[noitemsep]")
+    assert latex.count(r"\item") == 2
+
+
+def test_spacing_and_breaks(report):
+    report.createNewPage()
+    report.createNewLine()
+    report.addLineBreak()
+    for size in ("small", "medium", "large"):
+        report.addVSpace(size)
+
+    latex = report.render()
+
+    assert r"\newpage" in latex
+    assert r"\linebreak" in latex
+    assert r"\smallskip" in latex and r"\medskip" in latex
+
+
+def test_figure_from_a_file(report):
+    report.addFigure("plot.png", caption="Plot", label="plot", width="5cm")
+    report.addFigure("other.png")
+
+    latex = report.render()
+
+    assert r"\includegraphics[width=5cm]{plot.png}" in latex
+    assert r"\label{fig: plot}" in latex
+    assert report.assets[-2:] == ["plot.png", "other.png"]
+
+
+def test_nested_sections(report):
+    report.createSection("One")
+    report.createSubSection("One.One")
+    report.createSubSubSection("One.One.One")
+    report.addText("Deep")
+    report.createSection("Two")
+
+    latex = report.render()
+
+    assert latex.index(r"\subsubsection{One.One.One}") < latex.index("Deep")
+    assert latex.index("Deep") < latex.index(r"\section{Two}")
+
+
+def test_render_to_a_file_object(report):
+    report.createSection("Section")
+    report.addText("Text")
+    buffer = io.StringIO()
+
+    report.render(buffer)
+
+    assert buffer.getvalue() == report.render()
+
+
+def test_pickled_report_keeps_building(report):
+    report.createSection("Section")
+    report.addText("Text")
+
+    copy = pickle.loads(pickle.dumps(report))
+    copy.addText("More")
+    report.addText("More")
+
+    assert copy.render() == report.render()
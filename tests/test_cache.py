@@ -0,0 +1,33 @@
+import os
+
+from pytexreport.cache import BuildCache
+
+
+def test_default_directory_is_in_the_user_cache(monkeypatch, tmp_path):
+    monkeypatch.setenv("HOME", str(tmp_path))
+
+    assert BuildCache().directory == str(tmp_path / ".cache" / "pytexreport")
+
+
+def test_key_follows_file_contents_and_options(tmp_path):
+    cache = BuildCache(str(tmp_path / "cache"))
+    tex = tmp_path / "doc.tex"
+    tex.write_text("one")
+    key = cache.key([str(tex)])
+
+    assert cache.key([str(tex)]) == key
+    assert cache.key([str(tex)], options=["lualatex"]) != key
+    tex.write_text("two")
+    assert cache.key([str(tex)]) != key
+
+
+def test_put_and_get_copy_the_pdf(tmp_path):
+    cache = BuildCache(str(tmp_path / "cache"))
+    (tmp_path / "doc.pdf").write_bytes(b"%PDF-1.5\n")
+
+    assert not cache.get("ab12", str(tmp_path / "copy.pdf"))
+    cache.put("ab12", str(tmp_path / "doc.pdf"))
+
+    assert cache.get("ab12", str(tmp_path / "copy.pdf"))
+    assert (tmp_path / "copy.pdf").read_bytes() == b"%PDF-1.5\n"
+    assert os.listdir(tmp_path / "cache" / "ab") == ["ab12.pdf"]
@@ -0,0 +1,400 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from loguru import logger
+from pylatex.errors import CompilerError
+
+from pytexreport import compiler
+from pytexreport.compiler import (
+    ENGINES,
+    Engine,
+    EngineError,
+    compile_tex,
+    compile_tex_async,
+    register_engine,
+    select_engine,
+    set_compile_limit,
+)
+from pytexreport.style.basicHomework import basicHomework
+from tests.conftest import install
+
+# An engine wrapper that leaves the real work to a grandchild, like latexmk
+WRAPPER = """\
+#!{python}
+import os
+import subprocess
+
+child = subprocess.Popen(["{python}", "-c", "import time; time.sleep(30)"])
+with open(os.path.join(os.path.dirname(__file__), "pid"), "w") as f:
+    f.write(str(child.pid))
+child.wait()
+"""
+
+
+# An engine that stops at an error, like pdflatex in nonstopmode
+FAILING = """\
+#!{python}
+print("This is pdfTeX")
+print("! Undefined control sequence.")
+print("l.3 x^")
+raise SystemExit(1)
+"""
+
+# Copies each cites.<extension> next to it to the document's .<extension>,
+# as an engine writes what a document cites for the bibliography tool
+CITING = """\
+#!{python}
+import glob
+import os
+import shutil
+import sys
+
+base = os.path.splitext(sys.argv[-1])[0]
+for path in glob.glob(os.path.join(os.path.dirname(__file__), "cites.*")):
+    shutil.copy(path, base + os.path.splitext(path)[1])
+"""
+
+# Logs its runs like the stand-in engine, and does nothing else
+TOOL = """\
+#!{python}
+import os
+import sys
+
+with open(os.path.join(os.path.dirname(__file__), "calls"), "a") as f:
+    f.write(" ".join(sys.argv) + "\\n")
+"""
+
+# Logs when it starts and ends a run of a second
+SERIAL = """\
+#!{python}
+import os
+import time
+
+with open(os.path.join(os.path.dirname(__file__), "calls"), "a") as f:
+    f.write("start\\n")
+time.sleep(1)
+with open(os.path.join(os.path.dirname(__file__), "calls"), "a") as f:
+    f.write("end\\n")
+"""
+
+# Sleeps before an engine run: cold seconds on the first run of the engine,
+# warm seconds on every run
+SLOW = """\
+import os
+import time
+
+warm = os.path.join(os.path.dirname(__file__), os.path.basename(__file__) + ".warm")
+if not os.path.exists(warm):
+    time.sleep({cold})
+    open(warm, "w").close()
+time.sleep({warm})
+"""
+
+
+@pytest.fixture
+def failing_tex(bindir):
+    install(bindir, "pdflatex", FAILING)
+
+
+@pytest.fixture
+def document(tmp_path):
+    (tmp_path / "doc.tex").write_text("\\documentclass{article}\n")
+    return str(tmp_path / "doc")
+
+
+@pytest.fixture
+def records():
+    messages = []
+    sink = logger.add(messages.append, level="DEBUG", format="{level} {message}")
+    yield messages
+    logger.remove(sink)
+
+
+def test_passes_stop_once_aux_files_converge(fake_tex, document):
+    result = compile_tex(document)
+
+    # The second pass leaves the .aux unchanged
+    assert result.passes == 2
+    assert result.bibliographyRuns == 0
+    assert (fake_tex / "calls").read_text().count("doc.tex") == 2
+
+
+def test_draft_passes_end_with_one_full_pass(fake_tex, document):
+    result = compile_tex(document, draft=True)
+
+    calls = (fake_tex / "calls").read_text().splitlines()
+    assert result.passes == 3
+    assert [call.startswith("-draftmode") for call in calls] == [True, True, False]
+
+
+def test_compile_logging_is_off_by_default(fake_tex, document, records):
+    compile_tex(document)
+
+    assert records == []
+
+
+def test_compile_logging_is_debug_level(fake_tex, document, records):
+    logger.enable("pytexreport.compiler")
+    try:
+        compile_tex(document)
+    finally:
+        logger.disable("pytexreport.compiler")
+
+    assert records == [
+        f"DEBUG Compiled {document}.tex in 2 pass(es) and 0 bibliography run(s)\n"
+    ]
+
+
+def test_failed_compile_reports_the_tex_output(failing_tex, document, records):
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        compile_tex(document)
+
+    # Logging is off, so the exception is where the TeX error shows up
+    assert records == []
+    assert isinstance(error.value, EngineError)
+    assert str(error.value).endswith("! Undefined control sequence.\nl.3 x^")
+
+
+def test_failed_async_compile_reports_the_tex_output(failing_tex, document):
+    with pytest.raises(EngineError, match="Undefined control sequence"):
+        asyncio.run(compile_tex_async(document))
+
+
+def test_async_compile(fake_tex, document):
+    result = asyncio.run(compile_tex_async(document))
+
+    assert result.passes == 2
+
+
+def test_output_uses_the_build_cache(fake_tex, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    report = basicHomework(title="Cached", subtitle="", author="A", author_id="1")
+    report.addText("Text")
+
+    first = report.output(cache_dir="cache")
+    os.remove(first)
+    second = report.output(cache_dir="cache")
+
+    assert first == second == "cached.pdf"
+    assert (tmp_path / second).read_bytes().startswith(b"%PDF")
+    assert (fake_tex / "calls").read_text().count("cached.tex") == 2
+
+
+def test_output_async_uses_the_build_cache(fake_tex, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    report = basicHomework(title="Async", subtitle="", author="A", author_id="1")
+    report.addText("Text")
+
+    first = asyncio.run(report.output_async(cache_dir="cache"))
+    second = asyncio.run(report.output_async(cache_dir="cache"))
+
+    assert first == second == "async.pdf"
+    assert (fake_tex / "calls").read_text().count("async.tex") == 2
+    assert report.compileResult.passes == 0
+
+
+@pytest.mark.skipif(not hasattr(os, "killpg"), reason="needs process groups")
+def test_async_timeout_kills_the_engine_and_its_children(tmp_path, document):
+    wrapper = install(tmp_path, "wrapper", WRAPPER)
+
+    start = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(compile_tex_async(document, compiler=str(wrapper), timeout=1))
+
+    assert time.monotonic() - start < 10
+    pid = int((tmp_path / "pid").read_text())
+    gone = False
+    for _ in range(50):
+        time.sleep(0.1)
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            gone = True
+            break
+    assert gone, "the engine's child process is still running"
+
+
+class DraftHomework(basicHomework):
+    draftmode = True
+
+
+def test_style_compile_defaults_reach_the_engine(fake_tex, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    plain = basicHomework(title="Plain", subtitle="", author="A", author_id="1")
+    draft = DraftHomework(title="Draft", subtitle="", author="A", author_id="1")
+
+    plain.output()
+    draft.output()
+
+    calls = (fake_tex / "calls").read_text().splitlines()
+    assert [call.startswith("-draftmode") for call in calls] == [
+        False,
+        False,
+        True,
+        True,
+        False,
+    ]
+    assert draft.compileResult.passes == 3
+
+
+def test_report_keeps_the_engine_it_selects(fake_tex, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    report = basicHomework(title="Engine", subtitle="", author="A", author_id="1")
+
+    assert report.selectEngine(["pdflatex"]) == "pdflatex"
+    assert report.engine == "pdflatex"
+    report.enableStreaming()
+    with pytest.raises(ValueError):
+        report.selectEngine()
+
+
+def test_engine_selection_does_not_time_cold_caches(bindir, document):
+    # pdflatex is slow only on its very first run, lualatex is always slower
+    # than a warm pdflatex
+    for name, cold, warm in (("pdflatex", 0.8, 0), ("lualatex", 0, 0.1)):
+        install(bindir, name, prelude=SLOW.format(cold=cold, warm=warm))
+
+    assert select_engine(document, ["pdflatex", "lualatex"]) == "pdflatex"
+
+
+@pytest.mark.parametrize(
+    "tool, extension, content",
+    [
+        ("bibtex", "aux", "\\citation{knuth}\n\\bibdata{refs}\n"),
+        ("biber", "bcf", "<bcf:citekey order='1'>knuth</bcf:citekey>\n"),
+    ],
+)
+def test_citations_run_the_bibliography_tool_once(
+    bindir, document, tool, extension, content
+):
+    install(bindir, "pdflatex", CITING)
+    install(bindir, tool, TOOL)
+    (bindir / f"cites.{extension}").write_text(content)
+
+    result = compile_tex(document)
+
+    assert result.passes == 2
+    assert result.bibliographyRuns == 1
+    assert (bindir / "calls").read_text().split() == [str(bindir / tool), "doc"]
+
+
+def test_unconverged_compiles_warn(fake_tex, document, records):
+    logger.enable("pytexreport.compiler")
+    try:
+        result = compile_tex(document, max_passes=1)
+    finally:
+        logger.disable("pytexreport.compiler")
+
+    assert result.passes == 1
+    assert records[0] == f"WARNING {document}.tex did not converge within 1 passes\n"
+
+
+def test_registered_engines_that_converge_alone_run_once(bindir, document, monkeypatch):
+    monkeypatch.setattr(compiler, "ENGINES", dict(ENGINES))
+    install(bindir, "fastex")
+    register_engine(Engine("fastex", converges=False))
+
+    result = compile_tex(document, compiler="fastex", compiler_args=["-quiet"])
+
+    assert result.passes == 1
+    assert (bindir / "calls").read_text() == f"-quiet {document}.tex\n"
+    assert "fastex" not in ENGINES
+
+
+def test_engines_can_be_passed_unregistered(bindir, document):
+    install(bindir, "fastex")
+
+    result = compile_tex(document, compiler=Engine("fastex", converges=False))
+
+    assert result.passes == 1
+
+
+def test_latexmk_loads_the_format_through_pdflatex(bindir, document):
+    install(bindir, "latexmk")
+
+    result = compile_tex(document, compiler="latexmk", fmt="preamble")
+
+    assert result.passes == 1
+    assert (bindir / "calls").read_text() == (
+        f"--pdf -pdflatex=pdflatex -fmt=preamble %O %S "
+        f"--interaction=nonstopmode {document}.tex\n"
+    )
+
+
+def test_clean_removes_the_aux_files_of_included_files(fake_tex, tmp_path):
+    (tmp_path / "doc.tex").write_text("\\include{part}\n")
+
+    compile_tex(str(tmp_path / "doc"))
+
+    assert sorted(os.listdir(tmp_path)) == ["doc.pdf", "doc.tex"]
+
+
+def test_documents_without_aux_files_compile_in_one_pass(bindir, document):
+    install(bindir, "pdflatex", TOOL)
+
+    assert compile_tex(document).passes == 1
+
+
+def test_clean_skips_included_aux_files_already_gone(tmp_path):
+    (tmp_path / "doc.aux").write_text("\\@input{part.aux}\n")
+
+    compiler._clean(str(tmp_path / "doc"))
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_missing_engines_are_reported(document):
+    with pytest.raises(CompilerError, match="Make sure no-such-tex is installed"):
+        compile_tex(document, compiler="no-such-tex")
+    with pytest.raises(CompilerError, match="Make sure no-such-tex is installed"):
+        asyncio.run(compile_tex_async(document, compiler="no-such-tex"))
+
+
+def test_engine_selection_needs_an_engine_that_compiles(failing_tex, document):
+    with pytest.raises(CompilerError, match="No engine could compile"):
+        select_engine(document, ["no-such-tex", "pdflatex"])
+
+
+def test_compile_limit_serializes_async_compiles(bindir, tmp_path):
+    install(bindir, "serial", SERIAL)
+    serial = Engine("serial", converges=False)
+    documents = []
+    for name in ("a", "b"):
+        (tmp_path / f"{name}.tex").write_text("\\documentclass{article}\n")
+        documents.append(str(tmp_path / name))
+
+    async def compileAll():
+        await asyncio.gather(
+            *(compile_tex_async(path, compiler=serial) for path in documents)
+        )
+
+    set_compile_limit(1)
+    try:
+        asyncio.run(compileAll())
+    finally:
+        set_compile_limit(os.cpu_count() or 1)
+
+    calls = (bindir / "calls").read_text().split()
+    assert calls == ["start", "end", "start", "end"]
+
+
+def test_killing_an_exited_engine_is_harmless():
+    process = subprocess.Popen(
+        [sys.executable, "-c", ""], start_new_session=compiler._NEW_SESSION
+    )
+    process.wait()
+
+    compiler._kill(process)
+
+
+def test_engines_are_killed_alone_without_process_groups(monkeypatch):
+    monkeypatch.setattr(compiler, "_NEW_SESSION", False)
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+
+    compiler._kill(process)
+
+    assert process.wait(timeout=10) != 0
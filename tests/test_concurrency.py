@@ -0,0 +1,94 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from pytexreport.compiler import CompileResult
+from pytexreport.style.basicHomework import basicHomework
+from pytexreport.style.basicReport import basicReport
+
+REPORTS = 24
+THREADS = 8
+
+
+def build(index):
+    if index % 2:
+        report = basicHomework(
+            title=f"Homework {index}", subtitle="Threads", author="A", author_id="1"
+        )
+    else:
+        report = basicReport(
+            title=f"Report {index}",
+            subtitle="Threads",
+            department="D",
+            organization="O",
+            authors=["A"],
+        )
+    for i in range(20):
+        report.createSection(f"Section {index}.{i}")
+        report.addText(f"Text {index}.{i}")
+        report.createSubSection(f"Subsection {index}.{i}")
+        report.addEquation(rf"x_{{{index}}} = {i}")
+        report.createSubSubSection(f"Subsubsection {index}.{i}")
+        report.addMatrix("M", np.eye(2) * i)
+        report.addTable(data=[["a", "b"], [index, i]])
+    return report.render()
+
+
+def test_reports_built_in_threads_match_serial_builds():
+    serial = [build(index) for index in range(REPORTS)]
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        threaded = list(pool.map(build, range(REPORTS)))
+
+    assert threaded == serial
+
+
+def test_reports_do_not_share_builder_state():
+    first = basicHomework(title="First", subtitle="", author="A", author_id="1")
+    second = basicHomework(title="Second", subtitle="", author="B", author_id="2")
+
+    first.createSection("Only in first")
+    first.addText("First text")
+
+    assert second.presentSection is not first.presentSection
+    assert second.content == []
+    assert "Only in first" not in second.render()
+
+
+def test_report_shared_between_threads_keeps_every_call():
+    report = basicHomework(title="Shared", subtitle="", author="A", author_id="1")
+    report.createSection("Shared")
+
+    def fill(thread):
+        for i in range(200):
+            report.addText(f"Line {thread}-{i}")
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        list(pool.map(fill, range(THREADS)))
+
+    latex = report.render()
+    assert latex.count("Line ") == THREADS * 200
+
+
+def test_builder_calls_run_while_output_async_compiles(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    report = basicHomework(title="Shared", subtitle="", author="A", author_id="1")
+    profile = report.enableProfiling()
+    report.createSection("Async")
+
+    async def compiling(filename, **options):
+        # Another thread fills the report while the engine runs
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, report.addText, "During")
+        assert profile._open == []
+        (tmp_path / (filename + ".pdf")).write_bytes(b"%PDF")
+        return CompileResult(passes=1)
+
+    monkeypatch.setattr("pytexreport.pytexreport.compile_tex_async", compiling)
+
+    assert asyncio.run(report.output_async()) == "shared.pdf"
+    assert report.compileResult.passes == 1
+    assert profile.methods["addText"].bytes == len("During")
+    assert profile.methods["output_async"].calls == 1
+    assert profile.phases["compile"].bytes == len(b"%PDF")
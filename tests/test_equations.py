@@ -0,0 +1,118 @@
+import importlib.metadata
+import pickle
+
+import latexify
+import pytest
+
+from pytexreport import equations
+from pytexreport.equations import EquationCache
+from pytexreport.style.basicHomework import basicHomework
+
+
+# Only their source is read, by latexify
+def square(x):
+    return x**2  # pragma: no cover
+
+
+def cube(x):
+    return x**3  # pragma: no cover
+
+
+def scaled(alpha):
+    return alpha * 2  # pragma: no cover
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    # Names of the functions latexify was asked to convert
+    names = []
+    getLatex = latexify.get_latex
+
+    def counted(function, **options):
+        names.append(function.__name__)
+        return getLatex(function, **options)
+
+    monkeypatch.setattr(latexify, "get_latex", counted)
+    return names
+
+
+def test_least_recently_used_entry_is_evicted(calls):
+    cache = EquationCache(maxsize=2)
+
+    cache.get(square)
+    cache.get(cube)
+    cache.get(square)
+    cache.get(scaled)
+
+    assert len(cache.entries) == 2
+    assert cache.get(square) == latexify.get_latex(square)
+    cache.get(cube)
+    assert calls == ["square", "cube", "scaled", "square", "cube"]
+
+
+def test_options_are_separate_entries(calls):
+    cache = EquationCache()
+
+    plain = cache.get(scaled)
+    symbols = cache.get(scaled, {"use_math_symbols": True})
+
+    assert plain != symbols
+    assert r"\alpha" in symbols
+    assert cache.get(scaled, {"use_math_symbols": True}) == symbols
+    assert calls == ["scaled", "scaled"]
+
+
+def test_disk_entries_are_reused_by_a_new_cache(tmp_path, calls):
+    latex = EquationCache(directory=str(tmp_path)).get(square)
+
+    assert EquationCache(directory=str(tmp_path)).get(square) == latex
+    assert calls == ["square"]
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_disk_entries_follow_the_latexify_version(tmp_path, calls, monkeypatch):
+    EquationCache(directory=str(tmp_path)).get(square)
+    monkeypatch.setattr(equations, "_latexifyVersion", lambda: "0.0.0")
+
+    EquationCache(directory=str(tmp_path)).get(square)
+
+    assert calls == ["square", "square"]
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_latexify_version_comes_from_the_installed_distribution():
+    assert equations._latexifyVersion() == importlib.metadata.version("latexify-py")
+
+
+def test_add_equation_converts_a_function_once(calls):
+    report = basicHomework(title="Equations", subtitle="", author="A", author_id="1")
+    report.equationCache = EquationCache()
+
+    report.addEquation(square)
+    report.addEquation(square, inline=True)
+
+    assert calls == ["square"]
+    assert report.content[1] == "$" + latexify.get_latex(square) + "$"
+
+
+def test_pickled_cache_starts_empty(tmp_path):
+    cache = EquationCache(maxsize=8, directory=str(tmp_path))
+    cache.get(square)
+
+    copy = pickle.loads(pickle.dumps(cache))
+
+    assert (copy.maxsize, copy.directory, len(copy.entries)) == (8, str(tmp_path), 0)
+    assert copy.get(square) == cache.get(square)
+    assert equations.defaultEquationCache() is equations.defaultEquationCache()
+
+
+def test_version_is_empty_without_a_latexify_distribution(monkeypatch):
+    def version(name):
+        raise importlib.metadata.PackageNotFoundError(name)
+
+    monkeypatch.setattr(importlib.metadata, "version", version)
+    equations._latexifyVersion.cache_clear()
+    try:
+        assert equations._latexifyVersion() == ""
+    finally:
+        equations._latexifyVersion.cache_clear()
@@ -0,0 +1,104 @@
+import os
+import pickle
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+from matplotlib.figure import Figure  # noqa: E402
+
+from pytexreport import figures  # noqa: E402
+from pytexreport.figures import FigureRenderer, _render, fingerprint  # noqa: E402
+from pytexreport.style.basicHomework import basicHomework  # noqa: E402
+
+
+def plot(y=(3, 1, 2)):
+    figure = plt.figure()
+    plt.plot([1, 2, 3], list(y))
+    plt.title("Plot")
+    return figure
+
+
+def test_same_plot_on_fresh_figures_has_one_fingerprint():
+    first, second = plot(), plot()
+    assert first.number != second.number
+
+    assert fingerprint(first, 300, "pdf") == fingerprint(second, 300, "pdf")
+    plt.close("all")
+
+
+def test_pyplot_and_standalone_figures_match():
+    standalone = Figure()
+    axes = standalone.add_subplot()
+    axes.plot([1, 2, 3], [3, 1, 2])
+    axes.set_title("Plot")
+
+    assert fingerprint(plot(), 300, "pdf") == fingerprint(standalone, 300, "pdf")
+    plt.close("all")
+
+
+def test_data_and_settings_change_the_fingerprint():
+    figure = plot()
+    digest = fingerprint(figure, 300, "pdf")
+
+    assert fingerprint(plot((1, 1, 1)), 300, "pdf") != digest
+    assert fingerprint(figure, 150, "pdf") != digest
+    assert fingerprint(figure, 300, "png") != digest
+    plt.close("all")
+
+
+def test_identical_plots_across_reports_render_once(tmp_path):
+    renderer = FigureRenderer(str(tmp_path / "figures"), workers=1)
+    reports = [
+        basicHomework(title=f"Plots {i}", subtitle="", author="A", author_id="1")
+        for i in range(2)
+    ]
+    try:
+        for report in reports:
+            report.figureRenderer = renderer
+            plot()
+            report.addMatplot(plt, caption="Plot")
+            report.waitForFigures()
+    finally:
+        renderer.shutdown()
+        plt.close("all")
+
+    assert reports[0].assets == reports[1].assets
+    assert os.listdir(tmp_path / "figures") == [os.path.basename(reports[0].assets[0])]
+
+
+def test_plot_width_and_label(tmp_path):
+    report = basicHomework(title="Plots", subtitle="", author="A", author_id="1")
+    report.figureRenderer = FigureRenderer(str(tmp_path / "figures"), workers=1)
+    try:
+        plot()
+        report.addMatplot(plt, label="plot", width="5cm")
+        latex = report.render()
+    finally:
+        report.figureRenderer.shutdown()
+        plt.close("all")
+
+    assert rf"\includegraphics[width=5cm]{{{report.assets[0]}}}" in latex
+    assert r"\label{fig: plot}" in latex
+
+
+def test_rendering_leaves_no_figures_open(tmp_path):
+    data = pickle.dumps(plot())
+    plt.close("all")
+
+    for i in range(5):
+        _render(data, str(tmp_path / f"plot{i}.pdf"), 72)
+
+    assert plt.get_fignums() == []
+    assert len(os.listdir(tmp_path)) == 5
+
+
+def test_default_renderer_is_shared_and_uses_the_user_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setattr(figures, "_defaultRenderer", None)
+
+    renderer = figures.defaultRenderer()
+
+    assert figures.defaultRenderer() is renderer
+    assert renderer.directory == str(tmp_path / ".cache" / "pytexreport" / "figures")
@@ -0,0 +1,49 @@
+import pytest
+from loguru import logger
+from pylatex import NoEscape
+
+from pytexreport.style.basicHomework import basicHomework
+
+
+class Counted(NoEscape):
+    reprs = 0
+
+    def __repr__(self):  # pragma: no cover
+        Counted.reprs += 1
+        return super().__repr__()
+
+
+@pytest.fixture
+def records():
+    messages = []
+    sink = logger.add(messages.append, level="DEBUG", format="{level} {message}")
+    yield messages
+    logger.remove(sink)
+
+
+@pytest.fixture
+def report():
+    report = basicHomework(title="Flush", subtitle="", author="A", author_id="1")
+    report.createSection("Section")
+    report.createSubSection("Subsection")
+    report.content += [Counted("a"), Counted("b")]
+    Counted.reprs = 0
+    return report
+
+
+def test_flush_logs_nothing_by_default(report, records):
+    report.flush()
+
+    assert records == []
+    assert Counted.reprs == 0
+
+
+def test_flush_logs_counts_at_debug_level(report, records):
+    logger.enable("pytexreport.pytexreport")
+    try:
+        report.flush()
+    finally:
+        logger.disable("pytexreport.pytexreport")
+
+    assert records == ["DEBUG flush level=0 open sections=2 pending items=2\n"]
+    assert Counted.reprs == 0
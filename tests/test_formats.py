@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+from pytexreport.formats import ENDOFDUMP, PreambleFormats
+from pytexreport.style.basicHomework import basicHomework
+from tests.conftest import install
+
+# Dumps an empty format and its log with -ini; it fails to when a "broken"
+# file exists next to it, and writes no log when a "nolog" file does. Any
+# other run behaves like the stand-in engine
+INI = """\
+import os
+import sys
+
+if "-ini" in sys.argv:
+    here = os.path.dirname(__file__)
+    with open(os.path.join(here, "calls"), "a") as f:
+        f.write(" ".join(sys.argv[1:]) + "\\n")
+    if os.path.exists(os.path.join(here, "broken")):
+        raise SystemExit(1)
+    options = dict(arg.split("=", 1) for arg in sys.argv if "=" in arg)
+    path = os.path.join(options["-output-directory"], options["-jobname"])
+    open(path + ".fmt", "w").close()
+    if not os.path.exists(os.path.join(here, "nolog")):
+        open(path + ".log", "w").close()
+    raise SystemExit(0)
+"""
+
+
+@pytest.fixture
+def ini_tex(bindir):
+    install(bindir, "pdflatex", prelude=INI)
+    return bindir
+
+
+@pytest.fixture
+def document(tmp_path):
+    (tmp_path / "doc.tex").write_text(
+        "\\documentclass{article}\n"
+        "\\usepackage{amsmath}\n"
+        f"{ENDOFDUMP}\n"
+        "\\begin{document}\n"
+        "\\end{document}\n"
+    )
+    return str(tmp_path / "doc")
+
+
+def dumps(ini_tex):
+    calls = ini_tex / "calls"
+    return calls.read_text().count("-ini") if calls.exists() else 0
+
+
+def test_format_is_built_once_and_reused(ini_tex, document, tmp_path):
+    formats = PreambleFormats(str(tmp_path / "formats"))
+
+    fmt = formats.get(document)
+
+    assert fmt == os.path.join(str(tmp_path / "formats"), formats.key(document))
+    assert os.listdir(tmp_path / "formats") == [os.path.basename(fmt) + ".fmt"]
+    assert PreambleFormats(str(tmp_path / "formats")).get(document) == fmt
+    assert dumps(ini_tex) == 1
+
+
+def test_format_without_a_log(ini_tex, document, tmp_path):
+    (ini_tex / "nolog").touch()
+    formats = PreambleFormats(str(tmp_path / "formats"))
+
+    fmt = formats.get(document)
+
+    assert os.listdir(tmp_path / "formats") == [os.path.basename(fmt) + ".fmt"]
+
+
+def test_key_follows_the_preamble_and_class_files(ini_tex, document, tmp_path):
+    formats = PreambleFormats(str(tmp_path / "formats"))
+    (tmp_path / "style.cls").write_text("% one")
+    before = formats.key(document, [str(tmp_path / "style.cls")])
+
+    (tmp_path / "style.cls").write_text("% two")
+    changedClass = formats.key(document, [str(tmp_path / "style.cls")])
+    with open(document + ".tex", "a") as f:
+        f.write("% after the dump line\n")
+    changedBody = formats.key(document, [str(tmp_path / "style.cls")])
+
+    assert before != changedClass == changedBody
+
+
+def test_no_format_without_a_dump_line_or_an_engine(ini_tex, tmp_path):
+    (tmp_path / "plain.tex").write_text("\\documentclass{article}\n")
+    formats = PreambleFormats(str(tmp_path / "formats"))
+
+    assert formats.get(str(tmp_path / "plain")) is None
+    assert PreambleFormats(engine="no-such-engine").key("plain") is None
+
+
+def test_failed_dump_compiles_without_a_format(ini_tex, document, tmp_path):
+    (ini_tex / "broken").touch()
+
+    assert PreambleFormats(str(tmp_path / "formats")).get(document) is None
+    assert dumps(ini_tex) == 1
+
+
+def test_output_compiles_with_the_format(ini_tex, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    report = basicHomework(title="Format", subtitle="", author="A", author_id="1")
+    report.addText("Text")
+
+    report.output(format_dir="formats")
+
+    fmt = os.listdir(tmp_path / "formats")[0][: -len(".fmt")]
+    runs = (ini_tex / "calls").read_text().splitlines()
+    assert len(runs) == 3
+    assert all(f"-fmt={tmp_path / 'formats' / fmt}" in run for run in runs[1:])
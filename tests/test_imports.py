@@ -0,0 +1,100 @@
+import importlib
+import subprocess
+import sys
+
+import pytest
+
+from pytexreport.pytexreport import _PostImportHook
+
+# Cumulative import time allowed for a style module, in microseconds. It is
+# about 0.2 s without matplotlib and latexify; importing matplotlib alone
+# takes longer than the whole budget leaves.
+BUDGET = 500_000
+RUNS = 3
+
+STYLES = [
+    "pytexreport.style.basicHomework",
+    "pytexreport.style.basicReport",
+    "pytexreport.style.ieeeConference",
+]
+
+
+# Draws a plot with pyplot imported after the report module, like a script
+# that builds its report first
+FONT = """\
+import sys
+
+from pytexreport.style.basicHomework import basicHomework
+
+assert "matplotlib" not in sys.modules
+basicHomework(title="Fonts", subtitle="", author="A", author_id="1")
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+plt.figure()
+print(plt.title("Plot").get_family()[0])
+"""
+
+
+def importtime(module):
+    # Cumulative microseconds of every module imported, from -X importtime
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", STYLES)
+def test_styles_import_without_matplotlib_or_latexify(module):
+    imported = importtime(module)
+
+    assert module in imported
+    assert not [name for name in imported if name.split(".")[0] == "matplotlib"]
+    assert not [name for name in imported if name.split(".")[0] == "latexify"]
+
+
+@pytest.mark.parametrize("module", STYLES)
+def test_style_import_time_budget(module):
+    # The fastest of a few runs, so a busy machine does not fail the budget
+    fastest = min(importtime(module)[module] for _ in range(RUNS))
+
+    assert fastest < BUDGET, f"importing {module} took {fastest / 1000:.0f} ms"
+
+
+def test_plots_use_the_report_font_whatever_the_import_order():
+    output = subprocess.run(
+        [sys.executable, "-c", FONT], capture_output=True, text=True, check=True
+    ).stdout
+
+    assert output.strip() == "serif"
+
+
+def test_post_import_hook_runs_once_the_module_is_executed(tmp_path, monkeypatch):
+    (tmp_path / "hooked.py").write_text("VALUE = 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    seen = []
+    hook = _PostImportHook("hooked", lambda: seen.append(sys.modules["hooked"].VALUE))
+    monkeypatch.setattr(sys, "meta_path", [hook] + sys.meta_path)
+    try:
+        importlib.import_module("hooked")
+    finally:
+        sys.modules.pop("hooked", None)
+
+    assert seen == [1]
+    assert hook.find_spec("other") is None
+    assert (
+        _PostImportHook("no_such_module", seen.clear).find_spec("no_such_module")
+        is None
+    )
@@ -0,0 +1,112 @@
+import gc
+import tracemalloc
+
+import numpy as np
+from pylatex import Matrix, NoEscape, Section
+
+from pytexreport.pytexreport import fragment
+from pytexreport.style.basicHomework import basicHomework
+
+CALLS = 5_000
+
+
+def objectNodes(content, index):
+    # The nodes addText, addEquation and addMatrix appended before each call
+    # added a single pre-joined fragment
+    content.append(NoEscape(f"Text {index}"))
+    content.append("")
+    content.append(NoEscape(r"\begin{eqfloat}[H]"))
+    content.append(NoEscape(r"\begin{equation}"))
+    content.append(NoEscape(f"x_{{{index}}} = y"))
+    content.append(NoEscape(r"\end{equation}"))
+    content.append(NoEscape(r"\caption{" + f"Equation {index}" + r"}"))
+    content.append(NoEscape(r"\label{eq:" + f"e{index}" + r"}"))
+    content.append(NoEscape(r"\end{eqfloat}"))
+    content.append(NoEscape(r"\["))
+    content.append(NoEscape("M =" + Matrix(np.eye(2) * index, mtype="b").dumps()))
+    content.append(NoEscape(r"\]"))
+
+
+def fragmentNodes(content, index):
+    # The same calls as one fragment each
+    content.append(fragment(f"Text {index}", ""))
+    content.append(
+        fragment(
+            r"\begin{eqfloat}[H]",
+            r"\begin{equation}",
+            f"x_{{{index}}} = y",
+            r"\end{equation}",
+            r"\caption{" + f"Equation {index}" + r"}",
+            r"\label{eq:" + f"e{index}" + r"}",
+            r"\end{eqfloat}",
+        )
+    )
+    content.append(
+        fragment(r"\[", "M =" + Matrix(np.eye(2) * index, mtype="b").dumps(), r"\]")
+    )
+
+
+def builderCalls(report, index):
+    report.addText(f"Text {index}")
+    report.addEquation(
+        f"x_{{{index}}} = y", caption=f"Equation {index}", label=f"e{index}"
+    )
+    report.addMatrix("M", np.eye(2) * index)
+
+
+def homework():
+    return basicHomework(title="Nodes", subtitle="", author="A", author_id="1")
+
+
+def objectContent(calls):
+    content = []
+    for i in range(calls):
+        objectNodes(content, i)
+    return content
+
+
+def fragmentContent(calls):
+    content = []
+    for i in range(calls):
+        fragmentNodes(content, i)
+    return content
+
+
+def reportContent(calls):
+    report = homework()
+    for i in range(calls):
+        builderCalls(report, i)
+    return report.content
+
+
+def retained(build, calls):
+    # Bytes still allocated by what build() returns
+    gc.collect()
+    tracemalloc.start()
+    try:
+        content = build(calls)
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del content
+    return size
+
+
+def test_fragments_render_like_separate_nodes():
+    report = homework()
+    report.createSection("Nodes")
+    expected = Section("Nodes")
+    for i in range(3):
+        builderCalls(report, i)
+        objectNodes(expected, i)
+    report.flush()
+
+    assert report.section.dumps() == expected.dumps()
+
+
+def test_fragments_retain_less_memory():
+    objects = retained(objectContent, CALLS)
+    fragments = retained(reportContent, CALLS)
+
+    assert fragments < objects / 2
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from pytexreport.style.basicHomework import basicHomework
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def build(texts, subtitle=""):
+    report = basicHomework(
+        title="Preview", subtitle=subtitle, author="A", author_id="1"
+    )
+    for i, text in enumerate(texts):
+        report.createSection(f"Section {i}")
+        report.addText(text)
+    return report
+
+
+def runs(fake_tex):
+    calls = fake_tex / "calls"
+    return calls.read_text().count("preview.tex") if calls.exists() else 0
+
+
+def test_first_preview_compiles_every_section(fake_tex, workdir):
+    assert build(["a", "b", "c"]).preview() == "preview.pdf"
+
+    main = (workdir / "preview.tex").read_text()
+    assert r"\includeonly" not in main
+    assert main.count(r"\include{preview-") == 3
+    assert "a" in (workdir / "preview-1.tex").read_text()
+    state = json.loads((workdir / "preview.preview.json").read_text())
+    assert list(state["sections"]) == ["preview-1", "preview-2", "preview-3"]
+    assert runs(fake_tex) == 2
+
+
+def test_unchanged_preview_skips_tex(fake_tex, workdir):
+    build(["a", "b", "c"]).preview()
+    before = runs(fake_tex)
+
+    assert build(["a", "b", "c"]).preview() == "preview.pdf"
+
+    assert runs(fake_tex) == before
+
+
+def test_changed_section_is_compiled_alone(fake_tex, workdir):
+    build(["a", "b", "c"]).preview()
+    untouched = (workdir / "preview-1.tex").stat().st_mtime_ns
+
+    build(["a", "changed", "c"]).preview()
+
+    main = (workdir / "preview.tex").read_text()
+    assert r"\includeonly{preview-2}%" in main
+    assert "changed" in (workdir / "preview-2.tex").read_text()
+    assert (workdir / "preview-1.tex").stat().st_mtime_ns == untouched
+
+
+def test_change_to_the_main_part_rebuilds_everything(fake_tex, workdir):
+    build(["a", "b", "c"]).preview()
+
+    build(["a", "changed", "c"], subtitle="Draft").preview()
+
+    main = (workdir / "preview.tex").read_text()
+    assert r"\includeonly" not in main
+    assert "Draft" in main
+
+
+def test_missing_section_aux_recompiles_that_section(fake_tex, workdir):
+    build(["a", "b", "c"]).preview()
+    (workdir / "preview-3.aux").unlink()
+
+    build(["a", "b", "c"]).preview()
+
+    assert r"\includeonly{preview-3}%" in (workdir / "preview.tex").read_text()
+
+
+def test_subsection_without_a_section_stays_in_the_main_file(fake_tex, workdir):
+    report = basicHomework(title="Preview", subtitle="", author="A", author_id="1")
+    report.createSubSection("Loose")
+    report.addText("Loose text")
+    report.createSection("Section")
+    report.addText("Section text")
+
+    report.preview()
+
+    main = (workdir / "preview.tex").read_text()
+    assert r"\subsection{Loose}" in main
+    assert main.count(r"\include{preview-") == 1
+
+
+def test_streamed_report_cannot_be_previewed(workdir):
+    report = build(["a"])
+    report.enableStreaming()
+
+    with pytest.raises(ValueError):
+        report.preview()
@@ -0,0 +1,80 @@
+import json
+
+import numpy as np
+import pytest
+
+from pytexreport.profiling import fileSize
+from pytexreport.style.basicHomework import basicHomework
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def homework():
+    return basicHomework(title="Profiled", subtitle="", author="A", author_id="1")
+
+
+def test_profiling_is_off_by_default(workdir):
+    report = homework()
+    report.createSection("Section")
+    report.addText("Text")
+    report.output(tex_only=True)
+
+    assert report.profile is None
+
+
+def test_missing_files_have_no_size(workdir):
+    assert fileSize(str(workdir / "missing.pdf")) == 0
+
+
+def test_profile_records_builder_calls_and_output_phases(workdir):
+    report = homework()
+    profile = report.enableProfiling()
+    report.createSection("Section")
+    for _ in range(3):
+        report.addText("Text")
+    tex = report.output(tex_only=True)
+
+    assert report.profile is profile
+    assert profile.methods["addText"].calls == 3
+    assert profile.methods["addText"].bytes == len("Text") * 3
+    assert profile.methods["createSection"].calls == 1
+    assert profile.phases["tex"].bytes == (workdir / tex).stat().st_size
+    assert set(json.loads(profile.toJSON())) == {"methods", "phases"}
+    assert profile.toJSON(str(workdir / "profile.json")) == profile.toJSON()
+    assert (workdir / "profile.json").read_text() == profile.toJSON()
+
+
+def test_traced_profile_exports_every_call(workdir):
+    report = homework()
+    profile = report.enableProfiling(trace=True)
+    report.addText("Text")
+    report.addText("Text")
+
+    events = json.loads(profile.toChromeTrace())["traceEvents"]
+    assert [event["name"] for event in events] == ["addText", "addText"]
+    assert [event["args"]["bytes"] for event in events] == [4, 4]
+
+
+def test_profile_counts_the_latex_each_builder_produces(workdir):
+    report = homework()
+    profile = report.enableProfiling()
+    report.enableStreaming()
+    report.createSection("Section")
+    report.addTable(data=[["a", "b"], ["1", "2"]])
+    report.addTable(data=[["a", "b"], ["1", "2"]], longtable=True)
+    report.addEquation("x^2")
+    report.addMatrix("A", np.eye(2))
+    report.createSection("Next")
+
+    header, row = r"\textbf{a}&\textbf{b}\\", r"1&2\\"
+    # The float counts its rules and header too, the long table its rows
+    table = 3 * len(r"\hline") + len(header) + len(row)
+    assert profile.methods["addTable"].bytes == table + len(row)
+    assert profile.methods["addEquation"].bytes == len("x^2")
+    assert profile.methods["addMatrix"].bytes > len("A =")
+    # Opening the next section flushes the first one to the stream
+    assert profile.methods["flush"].bytes > 0
@@ -0,0 +1,60 @@
+import importlib.resources
+import os
+import sys
+import zipfile
+
+import pytest
+
+from pytexreport.resources import resource_path, texinputs
+
+
+@pytest.fixture(params=["files", "read_binary"])
+def api(request, monkeypatch):
+    # Python 3.8 has no importlib.resources.files
+    if request.param == "read_binary":
+        monkeypatch.delattr(importlib.resources, "files", raising=False)
+    resource_path.cache_clear()
+    yield request.param
+    resource_path.cache_clear()
+
+
+def test_installed_resource_is_used_in_place(api):
+    path = resource_path("pytexreport.style.basicHomework", "basicHomework.cls")
+
+    assert os.path.isfile(path)
+    assert os.path.dirname(path).endswith(os.path.join("style", "basicHomework"))
+
+
+# read_binary is deprecated where files exists
+@pytest.mark.filterwarnings("ignore:read_binary:DeprecationWarning")
+def test_zipped_resource_is_extracted_under_its_own_name(api, tmp_path, monkeypatch):
+    archive = tmp_path / "styles.zip"
+    with zipfile.ZipFile(archive, "w") as f:
+        f.writestr("zippedstyle/__init__.py", "")
+        f.writestr("zippedstyle/zipped.cls", "% class file")
+    monkeypatch.syspath_prepend(str(archive))
+
+    try:
+        path = resource_path("zippedstyle", "zipped.cls")
+    finally:
+        sys.modules.pop("zippedstyle", None)
+
+    assert os.path.basename(path) == "zipped.cls"
+    with open(path) as f:
+        assert f.read() == "% class file"
+
+
+def test_texinputs_searches_the_directories_first(monkeypatch):
+    monkeypatch.setenv("TEXINPUTS", "/existing")
+
+    env = texinputs(["/one", "/two"])
+
+    assert env["TEXINPUTS"] == os.pathsep.join(["/one", "/two", "/existing"])
+    assert texinputs([]) is None
+
+
+def test_texinputs_keeps_the_default_path(monkeypatch):
+    monkeypatch.delenv("TEXINPUTS", raising=False)
+
+    # The trailing separator appends TeX's own search path
+    assert texinputs(["/one"])["TEXINPUTS"] == "/one" + os.pathsep
@@ -0,0 +1,123 @@
+import gc
+import os
+import sys
+
+import pytest
+
+from pytexreport.style.basicHomework import basicHomework
+
+
+def build(stream, split_sections=False, sections=range(3)):
+    report = basicHomework(title="Stream", subtitle="", author="A", author_id="1")
+    if stream:
+        report.enableStreaming(split_sections=split_sections)
+    for i in sections:
+        report.createSection(f"Section {i}")
+        report.addText(f"Text {i}")
+        report.createSubSection(f"Subsection {i}")
+        report.addTable(data=[["a", "b"], [i, i]])
+    return report
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_streamed_report_renders_like_one_in_memory():
+    assert build(stream=True).render() == build(stream=False).render()
+
+
+def test_streamed_report_renders_repeatedly(tmp_path):
+    report = build(stream=True)
+
+    first = report.render()
+    report.render(str(tmp_path / "archive.tex"))
+
+    assert report.render() == first
+    assert (tmp_path / "archive.tex").read_text() == first
+    assert report.freeze().fill({}) == first
+    assert (tmp_path / report.output(tex_only=True)).read_text() == first
+
+
+def test_streamed_report_keeps_streaming_after_render():
+    report = build(stream=True)
+    report.render()
+
+    report.createSection("Section 3")
+    report.addText("Text 3")
+    report.createSubSection("Subsection 3")
+    report.addTable(data=[["a", "b"], [3, 3]])
+
+    assert report.render() == build(stream=False, sections=range(4)).render()
+
+
+def test_streamed_report_keeps_the_packages_of_dropped_items():
+    reports = []
+    for stream in (True, False):
+        report = basicHomework(title="Stream", subtitle="", author="A", author_id="1")
+        if stream:
+            report.enableStreaming()
+        report.createSection("Section")
+        report.addFigure("plot.png")
+        report.createSection("Next")
+        reports.append(report.render())
+
+    assert r"\usepackage{graphicx}" in reports[0]
+    assert reports[0] == reports[1]
+
+
+def test_split_sections_render_repeatedly(workdir):
+    report = build(stream=True, split_sections=True)
+
+    first = report.render()
+
+    assert report.render() == first
+    assert first.count(r"\include{stream-") == 3
+    assert (workdir / "stream-3.tex").is_file()
+
+
+def test_split_sections_keep_a_loose_subsection_in_the_body(workdir):
+    report = basicHomework(title="Stream", subtitle="", author="A", author_id="1")
+    report.enableStreaming(split_sections=True)
+    report.createSubSection("Loose")
+    report.createSection("Section")
+
+    latex = report.render()
+
+    assert r"\subsection{Loose}" in latex
+    assert latex.count(r"\include{stream-") == 1
+
+
+def test_split_sections_leave_unchanged_files_alone(workdir):
+    build(stream=True, split_sections=True).render()
+    os.utime(workdir / "stream-1.tex", ns=(0, 0))
+
+    build(stream=True, split_sections=True).render()
+
+    assert (workdir / "stream-1.tex").stat().st_mtime_ns == 0
+
+
+def test_body_file_is_removed_with_the_report(workdir):
+    report = build(stream=True)
+    report.render()
+    assert (workdir / "stream.body.tex").is_file()
+
+    del report
+    gc.collect()
+
+    assert not (workdir / "stream.body.tex").exists()
+
+
+def test_body_file_removed_early_is_not_an_error(workdir, monkeypatch):
+    errors = []
+    # Errors in finalizers are reported, not raised
+    monkeypatch.setattr(sys, "unraisablehook", errors.append)
+    report = build(stream=True)
+    os.remove(workdir / "stream.body.tex")
+
+    del report
+    gc.collect()
+
+    assert errors == []
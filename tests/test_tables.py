@@ -0,0 +1,174 @@
+import numpy as np
+import pytest
+from pylatex import Label, NoEscape, Table
+from pylatex.errors import TableRowSizeError
+from pylatex.table import Tabular
+from pylatex.utils import escape_latex
+
+from pytexreport.style.basicHomework import basicHomework
+
+
+def perCellTable(data, caption=None, label=None):
+    # The row-by-row Tabular loop addTable used before the vectorized path
+    table = Table(position="H")
+    ncol = len(data[0])
+    mtable = Tabular("|" + "|".join(["c"] * ncol) + "|")
+    for i in range(len(data)):
+        mtable.add_hline()
+        if i == 0:
+            mtable.add_row(
+                tuple(
+                    [
+                        escape_latex(NoEscape(r"\textbf{" + item + r"}"))
+                        for item in data[i]
+                    ]
+                )
+            )
+        else:
+            mtable.add_row(tuple([escape_latex(str(item)) for item in data[i]]))
+    mtable.add_hline()
+
+    if caption is not None:
+        table.add_caption(caption)
+    table.append(NoEscape(r"\centering"))
+    table.append(mtable)
+    if label is not None:
+        table.append(Label(f"tab: {label}"))
+    return table
+
+
+@pytest.fixture
+def report():
+    return basicHomework(title="Tables", subtitle="", author="A", author_id="1")
+
+
+def test_row_list_matches_per_cell_loop(report):
+    data = [["Name", "Value"], ["a_b", 1.5], ["50%", "x & y"], ["{}", -3]]
+
+    report.addTable(caption="Caption", label="values", data=data)
+
+    expected = perCellTable(data, caption="Caption", label="values")
+    assert report.content[-1].dumps() == expected.dumps()
+
+
+def test_array_columns_are_numbered_without_header(report):
+    report.addTable(data=np.arange(6).reshape(3, 2))
+
+    latex = report.content[-1].dumps()
+    assert r"\textbf{0}&\textbf{1}\\" in latex
+    assert latex.count(r"&") == 4
+    for row in ("0&1", "2&3", "4&5"):
+        assert row + r"\\" in latex
+
+
+def test_array_header_and_formats(report):
+    data = np.arange(4).reshape(2, 2) / 4
+
+    report.addTable(data=data, header=["x_1", "y"], formats=[".2f", ".1f"])
+
+    latex = report.content[-1].dumps()
+    assert r"\textbf{x\_1}&\textbf{y}\\" in latex
+    assert r"0.00&0.2\\" in latex
+    assert r"0.50&0.8\\" in latex
+
+
+def test_header_applies_to_every_row_of_a_row_list(report):
+    report.addTable(data=[["a", "b"], ["c", "d"]], header=["First", "Second"])
+
+    latex = report.content[-1].dumps()
+    assert r"\textbf{First}&\textbf{Second}\\" in latex
+    assert r"a&b\\" in latex and r"c&d\\" in latex
+
+
+def test_dataframe_and_dict_of_columns(report):
+    pd = pytest.importorskip("pandas")
+    columns = {"name": ["a", "b"], "share %": [0.25, 0.75]}
+
+    report.addTable(data=pd.DataFrame(columns), formats={"share %": ".0%"})
+    report.addTable(data=columns, formats={1: ".0%"})
+
+    frame, mapping = (item.dumps() for item in report.content[-2:])
+    assert frame == mapping
+    assert r"\textbf{share \%}" in frame
+    assert r"a&25\%\\" in frame
+
+
+def test_cells_are_escaped_one_by_one(report):
+    report.addTable(data={"raw": ["a\0b", "c&d"]})
+
+    latex = report.content[-1].dumps()
+    assert "a\0b" + r"\\" in latex
+    assert r"c\&d\\" in latex
+
+
+def test_nrow_counts_the_header_row(report):
+    report.addTable(data=np.arange(10).reshape(5, 2), header=["a", "b"], nrow=3)
+
+    latex = report.content[-1].dumps()
+    assert r"2&3\\" in latex
+    assert r"4&5\\" not in latex
+
+
+@pytest.mark.parametrize(
+    "data",
+    [np.arange(6).reshape(3, 2), {"a": [1, 2, 3]}, [["a"], [1], [2], [3]]],
+)
+def test_nrow_of_one_keeps_only_the_header(report, data):
+    report.addTable(data=data, nrow=1)
+
+    latex = report.content[-1].dumps()
+    assert latex.count(r"\\") == 1
+    assert r"\textbf{" in latex
+
+
+@pytest.mark.parametrize("nrow", [0, -1])
+def test_nrow_below_one_raises(report, nrow):
+    with pytest.raises(ValueError):
+        report.addTable(data={"a": [1, 2, 3]}, nrow=nrow)
+
+
+def test_mismatched_shapes_raise(report):
+    with pytest.raises(TableRowSizeError):
+        report.addTable(data=[["a", "b"], ["c"]])
+    with pytest.raises(TableRowSizeError):
+        report.addTable(data=np.zeros((2, 2)), header=["only one"])
+    with pytest.raises(TableRowSizeError):
+        report.addTable(data={"a": [1, 2], "b": [1]})
+    with pytest.raises(TableRowSizeError):
+        report.addTable(data=[["a", "b"], ["c", "d"]], ncol=3)
+
+
+@pytest.mark.parametrize(
+    "longtable, expected",
+    [(None, False), (False, False), (True, True), (0, True), (2, True), (3, False)],
+)
+def test_longtable_threshold(report, longtable, expected):
+    report.addTable(data=np.arange(6).reshape(3, 2), longtable=longtable)
+
+    latex = report.content[-1].dumps()
+    assert (r"\begin{longtable}" in latex) is expected
+    assert (r"\begin{table}" in latex) is not expected
+
+
+def test_longtable_repeats_header(report):
+    report.addTable(
+        caption="Long", label="long", data=np.arange(6).reshape(3, 2), longtable=True
+    )
+
+    latex = report.content[-1].dumps()
+    assert latex.count(r"\textbf{0}&\textbf{1}\\") == 2
+    assert r"\endfirsthead" in latex and r"\endhead" in latex
+    assert r"\caption{Long}\label{tab: long}\\" in latex
+
+
+def test_chunk_size_splits_into_floats(report):
+    report.addTable(data=np.arange(10).reshape(5, 2), caption="Chunks", chunk_size=2)
+
+    tables = report.content[-3:]
+    assert len(report.content) == 3
+    assert all(r"\textbf{0}&\textbf{1}\\" in table.dumps() for table in tables)
+    assert [r"\caption{Chunks}" in table.dumps() for table in tables] == [
+        True,
+        False,
+        False,
+    ]
@@ -0,0 +1,82 @@
+import io
+
+import pytest
+from pylatex import Command, NoEscape
+
+from pytexreport.style.basicReport import basicReport
+from pytexreport.templates import Template, placeholder
+
+# Whether each field is escaped: addText takes LaTeX, table cells and
+# captions take text
+FIELDS = {"name": True, "amount": True, "note": False}
+
+
+def build(values):
+    report = basicReport(
+        title="Statement",
+        subtitle="Monthly",
+        department="Billing",
+        organization="PyTexReport",
+        authors=["Billing"],
+    )
+    report.createSection("Customer")
+    report.addText(values["note"])
+    report.addTable(
+        caption=values["name"],
+        data=[["Customer", "Amount"], [values["name"], values["amount"]]],
+    )
+    return report
+
+
+def template():
+    fields = {field: placeholder(field, escape) for field, escape in FIELDS.items()}
+    return build(fields).freeze()
+
+
+def test_fill_matches_a_report_built_with_the_values():
+    values = {
+        "name": "Jane_Doe & Co",
+        "amount": "100 $",
+        "note": r"\textbf{Paid} in full & on time",
+    }
+
+    assert template().fill(values) == build(values).render()
+
+
+def test_one_field_can_be_escaped_in_one_place_and_not_another():
+    frozen = Template(placeholder("x") + "|" + placeholder("x", escape=False))
+
+    assert (
+        frozen.fill({"x": r"\emph{a_b}"}) == r"\textbackslash{}emph\{a\_b\}|\emph{a_b}"
+    )
+
+
+@pytest.mark.parametrize(
+    "method", ["createSection", "createSubSection", "createSubSubSection"]
+)
+def test_section_titles_reject_placeholders(method):
+    report = build({"name": "A", "amount": "1", "note": "B"})
+
+    with pytest.raises(ValueError):
+        getattr(report, method)(placeholder("title"))
+
+
+def test_fill_accepts_latex_and_writes_files(tmp_path):
+    frozen = template()
+    values = {
+        "name": Command("emph", "A"),
+        "amount": NoEscape(r"\textbf{1}"),
+        "note": "B",
+    }
+    buffer = io.StringIO()
+
+    frozen.fill(values, buffer)
+    frozen.fill(values, str(tmp_path / "variant.tex"))
+
+    assert r"\emph{A}&\textbf{1}\\" in buffer.getvalue()
+    assert (tmp_path / "variant.tex").read_text() == buffer.getvalue()
+
+
+def test_template_lists_its_fields():
+    assert set(template().fields) == set(FIELDS)
+    assert Template("no fields").fill({}) == "no fields"
@@ -0,0 +1,174 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from loguru import logger
+from pylatex.errors import CompilerError
+
+from pytexreport import worker
+from pytexreport.style.basicHomework import basicHomework
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def queued(queue):
+    report = basicHomework(title="Queued", subtitle="", author="A", author_id="1")
+    report.createSection("Section")
+    report.addText("Text")
+    return report.output(queue_dir=str(queue))
+
+
+def test_queued_report_is_compiled_by_a_worker(fake_tex, workdir):
+    job = queued(workdir / "queue")
+    assert not job.done()
+
+    worker.run(str(workdir / "queue"), once=True)
+
+    assert job.result(timeout=5) == str(workdir / "queued.pdf")
+    assert (workdir / "queued.pdf").read_bytes().startswith(b"%PDF")
+    assert job.compileResult.passes == 2
+    assert os.listdir(workdir / "queue" / "done") == []
+
+
+def test_command_line_worker_compiles_the_queue(fake_tex, workdir):
+    job = queued(workdir / "queue")
+
+    try:
+        worker.main([str(workdir / "queue"), "--once", "-j", "2"])
+    finally:
+        logger.disable("pytexreport")
+
+    assert asyncio.run(job._wait(poll=0.01)) == str(workdir / "queued.pdf")
+
+
+def test_failed_compile_stays_in_the_queue(workdir):
+    (workdir / "broken.tex").write_text("\\documentclass{article}\n")
+    job = worker.enqueue(
+        str(workdir / "queue"), "broken", ["broken.tex"], compiler="no-such-engine"
+    )
+
+    worker.run(str(workdir / "queue"), once=True)
+
+    with pytest.raises(CompilerError, match="Compiling broken failed"):
+        job.result(timeout=5)
+    failed = workdir / "queue" / "failed" / job.job
+    assert (failed / "broken.tex").is_file()
+    assert (failed / "error.txt").read_text()
+
+
+def test_result_times_out_without_a_worker(workdir):
+    job = queued(workdir / "queue")
+
+    with pytest.raises(TimeoutError):
+        job.result(timeout=0.2, poll=0.05)
+
+
+def test_bundles_of_stopped_workers_are_requeued(fake_tex, workdir):
+    stopped = subprocess.Popen([sys.executable, "-c", "pass"])
+    stopped.wait()
+    queue = workdir / "queue"
+    host = socket.gethostname()
+    crashed, running = queued(queue), queued(queue)
+    for job, pid in ((crashed, stopped.pid), (running, os.getpid())):
+        os.rename(
+            queue / "pending" / job.job,
+            queue / "running" / f"{job.job}@{host}@{pid}",
+        )
+
+    worker.run(str(queue), once=True)
+
+    assert crashed.result(timeout=5) == str(workdir / "queued.pdf")
+    # A bundle whose worker is still running is left to it
+    assert not running.done()
+    assert os.listdir(queue / "running") == [f"{running.job}@{host}@{os.getpid()}"]
+
+
+def test_awaited_job_waits_for_the_worker(fake_tex, workdir):
+    job = queued(workdir / "queue")
+    later = threading.Timer(0.3, worker.run, (str(workdir / "queue"),), {"once": True})
+
+    async def wait():
+        return await job
+
+    later.start()
+    try:
+        target = asyncio.run(wait())
+    finally:
+        later.join()
+
+    assert target == str(workdir / "queued.pdf")
+    # The PDF is copied once, later calls return it directly
+    os.remove(target)
+    assert job.result() == target
+    assert not os.path.exists(target)
+
+
+def test_worker_polls_until_interrupted(fake_tex, workdir, monkeypatch):
+    jobs = []
+
+    def sleep(seconds):
+        # A report is queued while the worker waits, then it is stopped
+        if jobs:
+            raise KeyboardInterrupt
+        jobs.append(queued(workdir / "queue"))
+
+    monkeypatch.setattr(time, "sleep", sleep)
+    try:
+        worker.main([str(workdir / "queue"), "--poll", "0"])
+    finally:
+        logger.disable("pytexreport")
+
+    assert jobs[0].done()
+    assert jobs[0].result() == str(workdir / "queued.pdf")
+
+
+def test_bundles_claimed_by_another_worker_are_skipped(workdir, monkeypatch):
+    paths = worker._directories(str(workdir / "queue"))
+    for job in ("a", "b"):
+        os.mkdir(os.path.join(paths["pending"], job))
+    rename = os.rename
+
+    def claimedFirst(source, target):
+        # Another worker takes a/ between the listing and the claim
+        monkeypatch.setattr(os, "rename", rename)
+        rename(source, os.path.join(paths["running"], "a@elsewhere@1"))
+        raise FileNotFoundError(source)
+
+    monkeypatch.setattr(os, "rename", claimedFirst)
+
+    claimed = worker._claim(paths)
+
+    assert claimed == f"b@{socket.gethostname()}@{os.getpid()}"
+
+
+def test_unknown_bundles_in_running_are_left_alone(workdir):
+    paths = worker._directories(str(workdir / "queue"))
+    os.mkdir(os.path.join(paths["running"], "stray"))
+
+    assert worker._requeue(paths) == 0
+    assert os.listdir(paths["running"]) == ["stray"]
+
+
+def test_workers_that_cannot_be_signalled_count_as_running(monkeypatch):
+    stopped = subprocess.Popen([sys.executable, "-c", "pass"])
+    stopped.wait()
+    assert not worker._alive(stopped.pid)
+
+    def kill(pid, signal):
+        raise PermissionError(pid)
+
+    # Owned by another user
+    monkeypatch.setattr(os, "kill", kill)
+    assert worker._alive(stopped.pid)
+    # Without POSIX signals
+    monkeypatch.setattr(os, "name", "nt")
+    assert worker._alive(stopped.pid)